@@ -0,0 +1,194 @@
+import cPickle
+import zlib
+from cStringIO import StringIO
+
+
+class PersonArchive(object):
+    """A compressed store of the state of people who are no longer present in the town.
+
+    People who die or depart the town otherwise keep everything they had in life: their faces,
+    personalities, routines, the record of their whereabouts on every simulated timestep, their
+    relationships, and dozens of family sets; what's more, everyone who knew them keeps a
+    Relationship object pointing at them. Archiving a person pickles and compresses all of
+    this into a record held here, leaving the Person object itself as a compact shell that
+    holds only their identity, names, key life events, and gravestone, so that everything
+    that refers to them still can. Others' relationships with them are moved into the record
+    as well.
+
+    Rehydration is lazy: as soon as anything touches an attribute of an archived person that
+    is not on their shell, Person.__getattr__() rehydrates them, restoring both their own state
+    and others' relationships with them; they may then be archived again by a later pass.
+    Read-only consumers of everyone's relationships (story recognition and SocialNetwork) go
+    through relationships_of() instead, which reads the records without rehydrating anyone.
+
+    The objects that belong to an archived person -- their face, personality, mind, routine,
+    whereabouts, and relationships (and the objects these are composed of) -- are pickled by
+    value, while everything else that they refer to (other people, places, events, etc.) is
+    pickled by reference, so that rehydration restores the very same objects and never
+    duplicates shared ones.
+    """
+
+    # The attributes that remain on the shell of an archived person; these are the ones that
+    # get touched during simulation even for people who are long gone (e.g., family sets and
+    # saliences get updated at the births of their descendants, and faces are inherited by
+    # way of biological parents), and they only refer to other objects rather than owning any
+    SHELL_ATTRIBUTES = frozenset((
+        'sim', 'id', 'type', 'archived', 'town', 'home', 'male', 'female', 'tag',
+        'first_name', 'middle_name', 'last_name', 'suffix', 'maiden_name', 'named_for',
+        'birth_year', 'birthday', 'age', 'adult', 'alive', 'death_year', 'gravestone',
+        'birth', 'adoption', 'marriage', 'spouse', 'retirement', 'departure', 'death', 'occupation',
+        'building_commissions',
+        'biological_mother', 'mother', 'biological_father', 'father', 'parents',
+        'ancestors', 'descendants', 'immediate_family', 'extended_family', 'greatgrandparents', 'grandparents',
+        'aunts', 'uncles', 'siblings', 'full_siblings', 'half_siblings', 'brothers', 'full_brothers',
+        'half_brothers', 'sisters', 'full_sisters', 'half_sisters', 'cousins', 'kids', 'sons', 'daughters',
+        'nephews', 'nieces', 'grandchildren', 'grandsons', 'granddaughters', 'greatgrandchildren',
+        'greatgrandsons', 'greatgranddaughters', 'bio_parents', 'bio_grandparents', 'bio_siblings',
+        'bio_full_siblings', 'bio_half_siblings', 'bio_brothers', 'bio_full_brothers', 'bio_half_brothers',
+        'bio_sisters', 'bio_full_sisters', 'bio_half_sisters', 'bio_immediate_family', 'bio_greatgrandparents',
+        'bio_uncles', 'bio_aunts', 'bio_cousins', 'bio_nephews', 'bio_nieces', 'bio_ancestors',
+        'bio_extended_family', 'acquaintances', 'friends', 'enemies', 'neighbors', 'former_neighbors',
+        'coworkers', 'former_coworkers', 'former_contractors', 'love_interest', 'significant_other',
+        'captivations', 'admirers', 'salience_of_other_people', 'in_the_workforce', 'intending_to_work',
+    ))
+    # The modules whose objects belong to a person (rather than being shared), when reached
+    # from that person's state without passing through any object of another module
+    OWNED_MODULES = frozenset(('face', 'personality', 'mind', 'routine', 'whereabouts', 'relationship'))
+    # Built-in types, which are always pickled by value
+    VALUE_TYPES = frozenset((
+        type(None), bool, int, long, float, str, unicode, tuple, list, dict, set, frozenset
+    ))
+
+    def __init__(self, sim):
+        """Initialize a PersonArchive object.
+
+        @param sim: The simulation whose absent people this object archives.
+        """
+        self.sim = sim
+        # Maps the IDs of archived people to (compressed pickle, list of objects pickled by reference) tuples
+        self.records = {}
+        # Maps the IDs of archived people to lists of their relationships with people who have since
+        # been rehydrated, which will be restored to them when they are rehydrated themselves
+        self.pending_relationships = {}
+        self.n_rehydrations = 0
+
+    def __str__(self):
+        """Return string representation."""
+        return "An archive of {n} people ({n_bytes} bytes compressed)".format(
+            n=len(self.records), n_bytes=sum(len(blob) for blob, _ in self.records.itervalues())
+        )
+
+    def archive_absent_people(self):
+        """Archive everyone who has been dead or departed for long enough.
+
+        This gets called by Simulation._update_date() at the end of each year.
+        """
+        config = self.sim.config
+        if not config.archive_absent_people:
+            return
+        latest_year_of_absence = self.sim.year - config.years_absent_before_archival
+        town = self.sim.town
+        for person in sorted(town.deceased | town.departed, key=lambda p: p.id):
+            if not person.archived and (person.death or person.departure).year <= latest_year_of_absence:
+                self.archive(person=person)
+
+    def archive(self, person):
+        """Archive this person, leaving only a compact shell of them."""
+        state = {
+            attribute: value for attribute, value in person.__dict__.iteritems()
+            if attribute not in self.SHELL_ATTRIBUTES
+        }
+        # Move others' relationships with this person into the record too (relationships are
+        # always formed in both directions, so this person's own relationships say who has
+        # them); those of people who are archived themselves are already in their records
+        others_relationships = [
+            other_person.relationships.pop(person) for other_person in person.relationships if
+            not other_person.archived and person in other_person.relationships
+        ]
+        owned_objects = self._objects_belonging_to(roots=(state, others_relationships))
+        references = []
+        reference_ids = {}
+
+        def persistent_id(obj):
+            """Return a reference for this object, or None if it is to be pickled by value."""
+            if type(obj) in self.VALUE_TYPES or id(obj) in owned_objects:
+                return None
+            reference = reference_ids.get(id(obj))
+            if reference is None:
+                reference = reference_ids[id(obj)] = len(references)
+                references.append(obj)
+            return reference
+
+        pickle_file = StringIO()
+        # Protocol 1, because under protocol 2 the facial and personality features (which subclass
+        # str and float) would be unpickled by calling their __new__() with only their values
+        pickler = cPickle.Pickler(pickle_file, 1)
+        pickler.persistent_id = persistent_id
+        pickler.dump((state, others_relationships))
+        blob = zlib.compress(pickle_file.getvalue(), self.sim.config.archive_compression_level)
+        self.records[person.id] = (blob, references)
+        for attribute in state:
+            delattr(person, attribute)
+        person.archived = True
+
+    def _objects_belonging_to(self, roots):
+        """Return the set of IDs of the objects that are reachable from these roots without passing
+        through any object that is not of a module in OWNED_MODULES."""
+        owned_objects = set()
+        to_visit = list(roots)
+        while to_visit:
+            obj = to_visit.pop()
+            obj_type = type(obj)
+            if obj_type in (tuple, list, set, frozenset):
+                to_visit.extend(obj)
+            elif obj_type is dict:
+                to_visit.extend(obj.iterkeys())
+                to_visit.extend(obj.itervalues())
+            elif obj_type.__module__ in self.OWNED_MODULES and id(obj) not in owned_objects:
+                owned_objects.add(id(obj))
+                to_visit.extend(getattr(obj, '__dict__', {}).itervalues())
+        return owned_objects
+
+    def relationships_of(self, people):
+        """Return a dictionary mapping each of these people to a dictionary mapping the people
+        they have relationships with to those relationships, without rehydrating anyone.
+
+        Relationships that are held in the archive are read from copies of its records, so the
+        ones returned for archived people (or with them) must be treated as read-only.
+        """
+        people_by_id = {person.id: person for person in people}
+        relationships_of = {
+            person: {} if person.archived else dict(person.relationships) for person in people_by_id.itervalues()
+        }
+        for person_id, (blob, references) in self.records.iteritems():
+            unpickler = cPickle.Unpickler(StringIO(zlib.decompress(blob)))
+            unpickler.persistent_load = references.__getitem__
+            state, others_relationships = unpickler.load()
+            if person_id in people_by_id:
+                relationships_of[people_by_id[person_id]].update(state['relationships'])
+            for relationship in others_relationships:
+                if relationship.owner in relationships_of:
+                    relationships_of[relationship.owner][relationship.subject] = relationship
+        for person_id, relationships in self.pending_relationships.iteritems():
+            if person_id in people_by_id:
+                for relationship in relationships:
+                    relationships_of[people_by_id[person_id]][relationship.subject] = relationship
+        return relationships_of
+
+    def rehydrate(self, person):
+        """Restore the full state of this archived person."""
+        blob, references = self.records.pop(person.id)
+        unpickler = cPickle.Unpickler(StringIO(zlib.decompress(blob)))
+        unpickler.persistent_load = references.__getitem__
+        state, others_relationships = unpickler.load()
+        person.__dict__.update(state)
+        person.archived = False
+        for relationship in others_relationships:
+            if relationship.owner.archived:
+                # Rather than rehydrating them too, hold onto this until they are
+                self.pending_relationships.setdefault(relationship.owner.id, []).append(relationship)
+            else:
+                relationship.owner.relationships[person] = relationship
+        for relationship in self.pending_relationships.pop(person.id, ()):
+            person.relationships[relationship.subject] = relationship
+        self.n_rehydrations += 1
@@ -2,6 +2,7 @@ import heapq
 from occupation import *
 from person import PersonExNihilo
 from residence import *
+from interval_index import IntervalIndex
 
 # Objects of a business class represents both the company itself and the building
 # at which it is headquartered. All business subclasses inherit generic attributes
@@ -19,6 +20,7 @@ class Business(object):
         """
         self.id = owner.sim.current_place_id
         owner.sim.current_place_id += 1
+        owner.sim.registry.register(kind='place', entity=self)
         config = owner.sim.config
         self.type = "business"
         # 'Demise' specifies a year at which point it is highly likely this business will close
@@ -29,6 +31,7 @@ class Business(object):
         self.town = owner.sim.town
         self.town.companies.add(self)
         self.founded = self.town.sim.year
+        self.town.sim.demographics.observe_business_opening(business=self)
         if self.town.vacant_lots or self.__class__ in config.companies_that_get_established_on_tracts:
             self.lot = self._init_choose_vacant_lot()
             demolition_preceding_construction_of_this_business = None
@@ -45,11 +48,14 @@ class Business(object):
             )
             self.lot = acquired_lot
         self.lot.building = self
+        self.town.add_service_provider(company=self)
         # First, hire employees -- this is done first because the first-ever business, a
         # construction firm started by the town founder, will need to hire the town's
         # first architect before it can construct its own building
         self.employees = set()
         self.former_employees = set()
+        # An index of the spans of time over which occupations here have been held, for point-in-time queries
+        self.employment_index = IntervalIndex()
         self.former_owners = []
         if self.__class__ in config.public_company_types:  # Hospital, police station, fire station, etc.
             self.owner = None
@@ -57,6 +63,8 @@ class Business(object):
         else:
             self.owner = self._init_set_and_get_owner_occupation(owner=owner)
             self.founder = self.owner
+            self.town.sim.story_recognizer.observe_company(company=self)
+            self.town.sim.history.observe_ownership(company=self)
         self._init_hire_initial_employees()
         # Also set the vacancies this company will initially have that may get filled
         # up gradually by people seeking employment (most often, this will be kids who
@@ -65,6 +73,8 @@ class Business(object):
             'day': list(config.initial_job_vacancies[self.__class__]['supplemental day']),
             'night': list(config.initial_job_vacancies[self.__class__]['supplemental night'])
         }
+        for shift in ('day', 'night'):
+            self.town.job_market.update(company=self, shift=shift)
         if self.__class__ not in config.companies_that_get_established_on_tracts:
             # Try to find an architect -- if you can't, you'll have to build it yourself
             architect = owner.contract_person_of_certain_occupation(occupation_in_question=Architect)
@@ -82,10 +92,18 @@ class Business(object):
         self.block = self.lot.block
         # Choose a name for this business
         self.name = None
-        while not self.name or any(c for c in self.town.companies if c is not self and c.name == self.name):
+        while not self.name or any(
+                c for c in self.town.sim.name_index.companies_named(self.name) if
+                c is not self and c in self.town.companies
+        ):
             self._init_get_named()
+        self.town.sim.name_index.index_company(self)
         # Set miscellaneous attributes
         self.people_here_now = set()
+        # Occupancy counters that let us check whether this building is locked without
+        # surveying everyone who is here; these get updated as people arrive and leave
+        self.people_working_here_now = {}  # Maps people working here now to their vocations
+        self.number_of_non_janitors_working_here_now = 0
         self.demolition = None  # Potentially gets set by event.Demolition.__init__()
         self.out_of_business = False  # Potentially gets changed by go_out_of_business()
         self.closure = None  # BusinessClosure object itself
@@ -106,6 +124,7 @@ class Business(object):
         if owner.occupation:
             owner.occupation.terminate(reason=hiring)
         owner.occupation = new_position
+        self.town.reindex_worker(person=owner)
         # Lastly, if the person was hired from outside the town, have them move to it
         if owner.town is not self.town:
             owner.move_into_the_town(hiring_that_instigated_move=hiring)
@@ -184,7 +203,7 @@ class Business(object):
             name = "{0} {1}".format(self.town.name, class_to_company_name_component[self.__class__])
         elif self.__class__ is Farm:
             name = "{}'s farm".format(self.owner.person.name)
-            if any(c for c in self.town.companies if c.name == name):
+            if any(c for c in self.town.sim.name_index.companies_named(name) if c in self.town.companies):
                 name = "{}'s farm".format(self.owner.person.full_name)
         elif self.__class__ is LawFirm:
             associates = [e for e in self.employees if e.__class__ is Lawyer]
@@ -417,9 +436,9 @@ class Business(object):
         # Other businesses are locked only when no one is working, or
         # at night when only a janitor is working
         else:
-            if not self.working_right_now:
+            if not self.people_working_here_now:
                 locked = True
-            elif not any(e for e in self.working_right_now if e[0] != 'janitor'):
+            elif not self.number_of_non_janitors_working_here_now:
                 locked = True
         return locked
 
@@ -438,8 +457,33 @@ class Business(object):
 
     @property
     def working_right_now(self):
-        people_working = [p for p in self.people_here_now if p.routine.working]
-        return [(p.occupation.vocation, p) for p in people_working]
+        return [(vocation, p) for p, vocation in self.people_working_here_now.iteritems()]
+
+    def register_arrival(self, person):
+        """Register that a person has arrived at this building for the current timestep."""
+        self.people_here_now.add(person)
+        if person.routine.working:
+            vocation = person.occupation.vocation
+            self.people_working_here_now[person] = vocation
+            if vocation != 'janitor':
+                self.number_of_non_janitors_working_here_now += 1
+
+    def register_departure(self, person):
+        """Register that a person has left this building."""
+        self.people_here_now.remove(person)
+        if person in self.people_working_here_now:
+            vocation = self.people_working_here_now.pop(person)
+            if vocation != 'janitor':
+                self.number_of_non_janitors_working_here_now -= 1
+
+    def employees_at(self, ordinal_date):
+        """Return the occupations held here as of the end of the given day, in order of when they began."""
+        return self.employment_index.at(ordinal_date=ordinal_date)
+
+    def employees_during(self, start_date, end_date):
+        """Return the occupations held here at any point between the given (ordinal) dates, inclusive,
+        in order of when they began."""
+        return self.employment_index.during(start_date=start_date, end_date=end_date)
 
     @property
     def day_shift(self):
@@ -498,6 +542,8 @@ class Business(object):
             # TODO not all businesses should transfer ownership using the standard hiring process
             if to_replace is self.owner:
                 self.owner = new_position
+                self.town.sim.story_recognizer.observe_company(company=self)
+                self.town.sim.history.observe_ownership(company=self)
         # Now instantiate a Hiring object to hold data about the hiring
         hiring = Hiring(subject=selected_candidate, company=self, occupation=new_position)
         # Now terminate the person's former occupation, if any (which may cause
@@ -515,6 +561,7 @@ class Business(object):
         # person was just hired for, triggering endless recursion as the company tries to
         # fill this vacancy in a Sisyphean nightmare)
         selected_candidate.occupation = new_position
+        self.town.reindex_worker(person=selected_candidate)
         # If this is a law firm and the new hire is a lawyer, change the name
         # of this firm to include the new lawyer's name
         if self.__class__ == "LawFirm" and new_position == Lawyer:
@@ -523,6 +570,7 @@ class Business(object):
         # config.py), then remove an instance of this position from that list
         if fills_supplemental_job_vacancy:
             self.supplemental_vacancies[shift].remove(occupation_of_need)
+            self.town.job_market.update(company=self, shift=shift)
             # This position doesn't have to be refilled immediately if terminated, so
             # attribute to it that it is supplemental
             selected_candidate.occupation.supplemental = True
@@ -598,23 +646,11 @@ class Business(object):
 
     def _assemble_job_candidates(self, occupation_of_need):
         """Assemble a group of job candidates for an open position."""
-        candidates = set()
         # Consider people that already work in this town -- this will subsume
-        # reasoning over people that could be promoted from within this company
-        for company in self.town.companies:
-            for position in company.employees:
-                person_is_qualified = self.check_if_person_is_qualified_for_the_position(
-                    candidate=position.person, occupation_of_need=occupation_of_need
-                )
-                if person_is_qualified:
-                    candidates.add(position.person)
-        # Consider unemployed (mostly young) people if they are qualified
-        for person in self.town.unemployed:
-            person_is_qualified = self.check_if_person_is_qualified_for_the_position(
-                candidate=person, occupation_of_need=occupation_of_need
-            )
-            if person_is_qualified:
-                candidates.add(person)
+        # reasoning over people that could be promoted from within this company --
+        # as well as unemployed (mostly young) people, if they are qualified; the
+        # town's labor pool indexes these people for us
+        candidates = self.town.labor_pool.candidates_for(company=self, occupation_of_need=occupation_of_need)
         return candidates
 
     def check_if_person_is_qualified_for_the_position(self, candidate, occupation_of_need):
@@ -1160,12 +1196,14 @@ class LawFirm(Business):
                 partners[-1].person.last_name
             )
             self.name = "Law Offices of {}".format(partners_str)
+            self.town.sim.name_index.index_company(self)
         elif partners:
             # If there's only one lawyer at this firm now, have its
             # name be 'Law Offices of [first name] [last name]'
             self.name = "Law Offices of {} {}".format(
                 partners[0].person.first_name, partners[0].person.last_name
             )
+            self.town.sim.name_index.index_company(self)
         else:
             # The only lawyer working here retired or departed the town -- the
             # business will shut down shortly and this will be its final name
@@ -1,7 +1,9 @@
 from appearance_config import AppearanceConfig
+from archive_config import ArchiveConfig
 from artifact_config import ArtifactConfig
 from basic_config import BasicConfig
 from businesses_config import BusinessesConfig
+from history_config import HistoryConfig
 from life_cycle_config import LifeCycleConfig
 from marriage_config import MarriageConfig
 from misc_character_config import MiscellaneousCharacterConfig
@@ -14,9 +16,10 @@ from story_recognition_config import StoryRecognitionConfig
 from town_generation_details_config import TownGenerationDetailsConfig
 
 ALL_CONFIG_FILES = [
-    AppearanceConfig, ArtifactConfig, BasicConfig, BusinessesConfig, LifeCycleConfig, MarriageConfig,
-    MiscellaneousCharacterConfig, MiscellaneousCharacterDecisionMakingConfig, PersonalityConfig,
-    RoutineConfig, SalienceConfig, SocialSimConfig, StoryRecognitionConfig, TownGenerationDetailsConfig
+    AppearanceConfig, ArchiveConfig, ArtifactConfig, BasicConfig, BusinessesConfig, HistoryConfig,
+    LifeCycleConfig, MarriageConfig, MiscellaneousCharacterConfig, MiscellaneousCharacterDecisionMakingConfig,
+    PersonalityConfig, RoutineConfig, SalienceConfig, SocialSimConfig, StoryRecognitionConfig,
+    TownGenerationDetailsConfig
 ]
 
 
@@ -1,3 +1,6 @@
+from utils import Sampler
+
+
 class AppearanceConfig(object):
     """Configuration parameters related to character appearance."""
     # This part of the system is so fleshed out because appearance is a critical component
@@ -209,6 +212,15 @@ class AppearanceConfig(object):
         "glasses": facial_feature_distributions_male["glasses"],
         "sunglasses": facial_feature_distributions_male["sunglasses"],
     }
+    # Compile samplers for the above distributions (do not alter these)
+    facial_feature_samplers_male = {
+        feature_type: Sampler(ranges=distribution)
+        for feature_type, distribution in facial_feature_distributions_male.items()
+    }
+    facial_feature_samplers_female = {
+        feature_type: Sampler(ranges=distribution)
+        for feature_type, distribution in facial_feature_distributions_female.items()
+    }
     child_skin_color_given_parents = {
         ('black', 'brown'): 'brown',
         ('brown', 'black'): 'brown',
@@ -0,0 +1,12 @@
+class ArchiveConfig(object):
+    """Configuration parameters related to archiving people who are no longer in the town."""
+    # Whether to archive people who have died or departed the town into compressed records that
+    # get rehydrated on demand (see PersonArchive), which keeps memory from growing with everyone
+    # who ever lived in the town; since others' relationships with archived people are set aside
+    # along with them, living people stop considering those relationships (e.g., when picking a
+    # new love interest), so turning this on changes the course of a simulation
+    archive_absent_people = False
+    # How many years someone must have been dead or departed before they get archived
+    years_absent_before_archival = 5
+    # The zlib compression level (1-9) for archive records
+    archive_compression_level = 6
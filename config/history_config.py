@@ -0,0 +1,14 @@
+class HistoryConfig(object):
+    """Configuration parameters related to recording the town's history for time-travel queries."""
+    # How often (in days) to snapshot who lives in the town, who lives where, and who owns what
+    # (see TownHistory); the state as of any day is reconstructed from the nearest earlier
+    # snapshot by replaying the changes logged since, so more frequent snapshots make queries
+    # faster at the cost of memory
+    history_snapshot_interval_in_days = 365
+    # Every this many snapshots, take a keyframe holding the full state, rather than a delta
+    # holding only the changes since the last snapshot
+    history_snapshots_per_keyframe = 10
+    # The maximum number of snapshots to keep, or None to keep them all; once this is exceeded,
+    # the oldest keyframe and its deltas are discarded, along with the changes logged before
+    # the next keyframe, and history before then can no longer be queried
+    history_max_snapshots = None
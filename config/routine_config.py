@@ -1,4 +1,4 @@
-from utils import fit_probability_distribution
+from utils import fit_probability_distribution, Sampler
 
 
 class RoutineConfig(object):
@@ -82,6 +82,10 @@ class RoutineConfig(object):
             relative_frequencies_dictionary=relative_frequencies_of_errands_for_service_types["night"]
         )
     }
+    errand_service_type_samplers = {
+        "day": Sampler.from_fitted_probability_distribution(probabilities_of_errand_for_service_type["day"]),
+        "night": Sampler.from_fitted_probability_distribution(probabilities_of_errand_for_service_type["night"])
+    }
     # Once a particular type of errand has been selected, these parameters drive reasoning
     # about which associated business to go to
     chance_someone_goes_to_closest_business_of_type = 0.75
@@ -93,12 +97,13 @@ class RoutineConfig(object):
         'if': 2.5,  # Immediate family
         'ef': 1.0  # Extended family
     }
-    # Do not alter these two
+    # Do not alter these three
     temp_probabilities = fit_probability_distribution(who_someone_visiting_will_visit_relative_frequencies)
     who_someone_visiting_will_visit_probabilities = tuple([
         ((temp_probabilities[relation][0], temp_probabilities[relation][1]), relation)
         for relation in temp_probabilities
     ])
+    who_someone_visiting_will_visit_sampler = Sampler(ranges=who_someone_visiting_will_visit_probabilities)
     # Miscellaneous: locking doors -- each building in a town (objects of Business and DwellingPlace
     # subclasses) will have a 'locked' attribute specifying whether the door of that building is
     # currently locked; this could be used to prevent players from entering locked doors (and indeed
@@ -110,6 +115,10 @@ class RoutineConfig(object):
     chance_someone_calls_in_sick_to_work = 0.03
     chance_someone_leaves_home_on_sick_day = 0.05
     chance_someone_doesnt_have_to_work_some_day = 0.00  # Untested, but could be used to model weekend schedules
+    # Whether to check every timestep's batched routine planning (see routine.RoutinePlanner) against
+    # Routine.decide_where_to_go() reading the timestep's conditions anew for each person; this is slow,
+    # so only use it for debugging
+    check_routine_planner_against_per_person_routines = False
     # These mappings are used to track the occasion for a character being at the location that they are at on a
     # given timestep; this data is recorded and may also be used to feed the reasoning of various systems
     business_type_to_occasion_for_visit = {
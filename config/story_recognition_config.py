@@ -1,5 +1,8 @@
 class StoryRecognitionConfig(object):
     """Configuration parameters related to story recognition."""
+    # Whether to keep stories up to date as they emerge during simulation (see
+    # StoryRecognizer.observe_relationship()), rather than only excavating them afterward
+    recognize_stories_incrementally = True
     # Love triangles
     spark_threshold_for_being_captivated = 20
     # Misanthropes
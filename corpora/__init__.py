@@ -1,60 +1,272 @@
 import os
+import sys
 import pickle
 import random
 import math
+from array import array
+from utils import Sampler
+
+
+# Corpora are resolved relative to this package, so that the town can be simulated
+# no matter which directory Python was started from
+CORPORA_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+# A precompiled form of the forename distributions; see precompile_forename_samplers()
+FORENAME_SAMPLERS_FILENAME = 'forenames_by_decade.bin'
+FORENAME_SAMPLERS_MAGIC = 'talktown-forenames 1 little-endian\n'
+
+
+def path_to_corpus(filename):
+    """Return the absolute path to the corpus file with the given name."""
+    return os.path.join(CORPORA_DIRECTORY, filename)
+
+
+def lines_of_corpus(filename):
+    """Return a tuple of the lines of the corpus file with the given name, sans newlines."""
+    with open(path_to_corpus(filename), 'r') as corpus:
+        return tuple(line.strip('\n') for line in corpus)
+
+
+class lazy_corpus(object):
+    """A class attribute that loads a corpus the first time it is accessed.
+
+    The decorated function is passed the class and should return the loaded corpus,
+    which then replaces this descriptor on the class, so it is only ever loaded once.
+    """
+
+    def __init__(self, load):
+        """Initialize a lazy_corpus object.
+
+        @param load: A function that takes a class and returns the corpus.
+        """
+        self.load = load
+        self.__doc__ = load.__doc__
+
+    def __get__(self, instance, owner):
+        corpus = self.load(owner)
+        setattr(owner, self.load.__name__, corpus)
+        return corpus
+
+
+def precompile_forename_samplers(path=None):
+    """Write the forename distributions in the precompiled binary form that Names loads.
+
+    The file begins with a magic line and a header line listing, for each decade and sex,
+    the offset and length of an array of cumulative probabilities (little-endian doubles)
+    and of the newline-separated names that those probabilities are upper bounds for. It
+    should be regenerated whenever the pickled distributions that it is compiled from change.
+    """
+    path = path or path_to_corpus(FORENAME_SAMPLERS_FILENAME)
+    names_by_decade = Names.names_by_decade
+    entries = []
+    sections = []
+    offset = 0
+    for decade in sorted(names_by_decade):
+        for sex in sorted(names_by_decade[decade]):
+            sampler = Sampler.from_fitted_probability_distribution(names_by_decade[decade][sex])
+            upper_bounds = array('d', sampler.upper_bounds)
+            if sys.byteorder != 'little':
+                upper_bounds.byteswap()
+            upper_bounds = upper_bounds.tostring()
+            names = '\n'.join(sampler.values)
+            entries.append('{} {} {} {} {} {}'.format(
+                decade, sex, offset, len(sampler.values), offset+len(upper_bounds), len(names))
+            )
+            sections += [upper_bounds, names]
+            offset += len(upper_bounds) + len(names)
+    with open(path, 'wb') as f:
+        f.write(FORENAME_SAMPLERS_MAGIC)
+        f.write(';'.join(entries) + '\n')
+        for section in sections:
+            f.write(section)
+
+
+def load_precompiled_forename_samplers(path):
+    """Return forename samplers read from a file written by precompile_forename_samplers()."""
+    with open(path, 'rb') as f:
+        if f.readline() != FORENAME_SAMPLERS_MAGIC:
+            raise Exception("{} is not a precompiled forenames file".format(path))
+        entries = f.readline().rstrip('\n').split(';')
+        sections = f.read()
+    forename_samplers = {}
+    for entry in entries:
+        decade, sex, offset, n_names, names_offset, names_length = entry.split()
+        offset, n_names, names_offset = int(offset), int(n_names), int(names_offset)
+        upper_bounds = array('d', sections[offset:offset+8*n_names])
+        if sys.byteorder != 'little':
+            upper_bounds.byteswap()
+        names = sections[names_offset:names_offset+int(names_length)].split('\n')
+        forename_samplers.setdefault(int(decade), {})[sex] = Sampler.from_cumulative_bounds(
+            upper_bounds=upper_bounds.tolist(), values=names
+        )
+    return forename_samplers
 
 
 class Names(object):
-    """A class that accesses names corpora to return random names."""
-    names_by_decade = pickle.load(open(
-        os.getcwd()+'/corpora/american_names_by_decade_with_'
-        'fitted_probability_distributions.dat', 'rb'
-    )
-    )
-    miscellaneous_masculine_forenames = tuple(
-        name[:-1] for name in
-        open(os.getcwd()+'/corpora/masculine_names.txt', 'r')
-    )
-    miscellaneous_feminine_forenames = tuple(
-        name[:-1] for name in
-        open(os.getcwd()+'/corpora/feminine_names.txt', 'r')
-    )
-    english_surnames = tuple(
-        name.strip('\n') for name in
-        open(os.getcwd()+'/corpora/english_surnames.txt', 'r')
-    )
-    french_surnames = tuple(
-        name.strip('\n') for name in
-        open(os.getcwd()+'/corpora/french_surnames.txt', 'r')
-    )
-    german_surnames = tuple(
-        name.strip('\n') for name in
-        open(os.getcwd()+'/corpora/german_surnames.txt', 'r')
-    )
-    irish_surnames = tuple(
-        name.strip('\n') for name in
-        open(os.getcwd()+'/corpora/irish_surnames.txt', 'r')
-    )
-    scandinavian_surnames = tuple(
-        name.strip('\n') for name in
-        open(os.getcwd()+'/corpora/scandinavian_surnames.txt', 'r')
-    )
-    all_surnames = (
-        english_surnames + french_surnames + german_surnames +
-        irish_surnames + scandinavian_surnames
-    )
-    place_names = tuple(
-        name.strip('\n') for name in
-        open(os.getcwd()+'/corpora/US_settlement_names.txt', 'r')
-    )
-    restaurant_names = tuple(
-        name.strip('\n') for name in
-        open(os.getcwd()+'/corpora/restaurant_names.txt', 'r')
-    )
-    bar_names = tuple(
-        name.strip('\n') for name in
-        open(os.getcwd()+'/corpora/bar_names.txt', 'r')
-    )
+    """A class that accesses names corpora to return random names.
+
+    Each corpus is loaded from disk the first time it is needed.
+    """
+
+    @lazy_corpus
+    def names_by_decade(cls):
+        """Maps decades to sexes ('M' or 'F') to fitted probability distributions over forenames."""
+        with open(path_to_corpus(
+                'american_names_by_decade_with_fitted_probability_distributions.dat'), 'rb'
+        ) as f:
+            return pickle.load(f)
+
+    @lazy_corpus
+    def forename_samplers(cls):
+        """Maps decades to sexes to compiled samplers for the above distributions."""
+        path = path_to_corpus(FORENAME_SAMPLERS_FILENAME)
+        if os.path.exists(path):
+            return load_precompiled_forename_samplers(path)
+        # Fall back to compiling them from the pickled distributions
+        return {
+            decade: {
+                sex: Sampler.from_fitted_probability_distribution(distributions_for_this_decade[sex])
+                for sex in distributions_for_this_decade
+            }
+            for decade, distributions_for_this_decade in cls.names_by_decade.items()
+        }
+
+    @lazy_corpus
+    def forename_samplers_by_letter(cls):
+        """Maps decades to sexes to lowercase first letters to samplers for the names of that
+        decade and sex starting with that letter, renormalized from the decade's distribution."""
+        forename_samplers_by_letter = {}
+        for decade in cls.forename_samplers:
+            forename_samplers_by_letter[decade] = {}
+            for sex, sampler in cls.forename_samplers[decade].items():
+                # Recover the probability of each name from the widths of the sampler's ranges
+                probabilities_by_letter = {}
+                lower_bound = 0.0
+                for upper_bound, name in zip(sampler.upper_bounds, sampler.values):
+                    probabilities_by_letter.setdefault(name[0].lower(), []).append(
+                        (upper_bound-lower_bound, name)
+                    )
+                    lower_bound = upper_bound
+                samplers_for_this_sex = forename_samplers_by_letter[decade][sex] = {}
+                for letter, probabilities in probabilities_by_letter.items():
+                    total_probability = sum(probability for probability, _ in probabilities)
+                    upper_bounds = []
+                    cumulative_probability = 0.0
+                    for probability, _ in probabilities:
+                        cumulative_probability += probability
+                        upper_bounds.append(cumulative_probability/total_probability)
+                    samplers_for_this_sex[letter] = Sampler.from_cumulative_bounds(
+                        upper_bounds=upper_bounds, values=[name for _, name in probabilities]
+                    )
+        return forename_samplers_by_letter
+
+    @lazy_corpus
+    def miscellaneous_forenames_by_letter(cls):
+        """Maps sexes to lowercase first letters to the miscellaneous forenames starting with that letter."""
+        miscellaneous_forenames_by_letter = {}
+        for sex, forenames in (
+                ('M', cls.miscellaneous_masculine_forenames), ('F', cls.miscellaneous_feminine_forenames)
+        ):
+            buckets = {}
+            for name in forenames:
+                if name:
+                    buckets.setdefault(name[0].lower(), []).append(name)
+            miscellaneous_forenames_by_letter[sex] = {letter: tuple(buckets[letter]) for letter in buckets}
+        return miscellaneous_forenames_by_letter
+
+    @lazy_corpus
+    def miscellaneous_masculine_forenames(cls):
+        return lines_of_corpus('masculine_names.txt')
+
+    @lazy_corpus
+    def miscellaneous_feminine_forenames(cls):
+        return lines_of_corpus('feminine_names.txt')
+
+    @lazy_corpus
+    def english_surnames(cls):
+        return lines_of_corpus('english_surnames.txt')
+
+    @lazy_corpus
+    def french_surnames(cls):
+        return lines_of_corpus('french_surnames.txt')
+
+    @lazy_corpus
+    def german_surnames(cls):
+        return lines_of_corpus('german_surnames.txt')
+
+    @lazy_corpus
+    def irish_surnames(cls):
+        return lines_of_corpus('irish_surnames.txt')
+
+    @lazy_corpus
+    def scandinavian_surnames(cls):
+        return lines_of_corpus('scandinavian_surnames.txt')
+
+    @lazy_corpus
+    def all_surnames(cls):
+        return (
+            cls.english_surnames + cls.french_surnames + cls.german_surnames +
+            cls.irish_surnames + cls.scandinavian_surnames
+        )
+
+    # Surname corpora by ethnicity, in the order in which a_surname_sounding_like() checks them
+    @lazy_corpus
+    def surnames_by_ethnicity(cls):
+        return (
+            ('English', cls.english_surnames), ('French', cls.french_surnames),
+            ('German', cls.german_surnames), ('Irish', cls.irish_surnames),
+            ('Scandinavian', cls.scandinavian_surnames),
+        )
+
+    @lazy_corpus
+    def surname_ethnicities(cls):
+        """Maps surnames to the ethnicity of the first surname corpus that they appear in."""
+        surname_ethnicities = {}
+        for ethnicity, surnames in cls.surnames_by_ethnicity:
+            for surname in surnames:
+                surname_ethnicities.setdefault(surname, ethnicity)
+        return surname_ethnicities
+
+    @lazy_corpus
+    def ethnicity_of_surname(cls):
+        """Maps surnames to their ethnicity, where surnames appearing in multiple corpora take
+        the ethnicity that comes first in Name._get_ethnicity_of_this_name()'s precedence."""
+        precedence = ('Scandinavian', 'Irish', 'German', 'French', 'English')
+        surnames = dict(cls.surnames_by_ethnicity)
+        ethnicity_of_surname = {}
+        for ethnicity in precedence:
+            for surname in surnames[ethnicity]:
+                ethnicity_of_surname.setdefault(surname, ethnicity)
+        return ethnicity_of_surname
+
+    @lazy_corpus
+    def surnames_by_ethnicity_and_letter(cls):
+        """Maps (ethnicity, lowercase first letter) tuples to the surnames of that ethnicity
+        starting with that letter, in corpus order."""
+        buckets = {}
+        for ethnicity, surnames in cls.surnames_by_ethnicity:
+            for surname in surnames:
+                buckets.setdefault((ethnicity, surname[0].lower()), []).append(surname)
+        return {key: tuple(buckets[key]) for key in buckets}
+
+    @lazy_corpus
+    def surnames_by_first_letter(cls):
+        """Maps lowercase first letters to all the surnames starting with that letter."""
+        buckets = {}
+        for surname in cls.all_surnames:
+            buckets.setdefault(surname[0].lower(), []).append(surname)
+        return {letter: tuple(buckets[letter]) for letter in buckets}
+
+    @lazy_corpus
+    def place_names(cls):
+        return lines_of_corpus('US_settlement_names.txt')
+
+    @lazy_corpus
+    def restaurant_names(cls):
+        return lines_of_corpus('restaurant_names.txt')
+
+    @lazy_corpus
+    def bar_names(cls):
+        return lines_of_corpus('bar_names.txt')
 
     @classmethod
     def a_masculine_name(cls, year):
@@ -68,12 +280,7 @@ class Names(object):
             name = random.choice(cls.miscellaneous_masculine_forenames)
         else:
             # Choose using the actual distribution of American names this decade
-            probability_distribution_for_this_decade = cls.names_by_decade[decade]['M']
-            name = next(
-                name for name in probability_distribution_for_this_decade if
-                probability_distribution_for_this_decade[name][0] <= x <=
-                probability_distribution_for_this_decade[name][1]
-            )
+            name = cls.forename_samplers[decade]['M'].draw(x)
         return name
 
     @classmethod
@@ -88,12 +295,7 @@ class Names(object):
             name = random.choice(cls.miscellaneous_masculine_forenames)
         else:
             # Choose using the actual distribution of American names this decade
-            probability_distribution_for_this_decade = cls.names_by_decade[decade]['F']
-            name = next(
-                name for name in probability_distribution_for_this_decade if
-                probability_distribution_for_this_decade[name][0] <= x <=
-                probability_distribution_for_this_decade[name][1]
-            )
+            name = cls.forename_samplers[decade]['F'].draw(x)
         return name
 
     @classmethod
@@ -129,78 +331,36 @@ class Names(object):
     @classmethod
     def a_masculine_name_starting_with(cls, letter, year):
         """Return a random masculine name starting with the given letter and befitting the given year."""
-        if year < 1880:
-            year = 1880
-        decade = int(math.floor(year/10)*10)  # Determine the current decade
-        x = random.random()
-        # Choose using the actual distribution of American names this decade
-        probability_distribution_for_this_decade = cls.names_by_decade[decade]['M']
-        try:
-            name = next(
-                name for name in probability_distribution_for_this_decade if
-                probability_distribution_for_this_decade[name][0] <= x <=
-                probability_distribution_for_this_decade[name][1] and
-                name[0].lower() == letter[0]
-            )
-        except StopIteration:
-            if random.random() < 0.5:
-                # Choose any miscellaneous name starting with the same letter
-                names_that_start_with_that_letter = [
-                    name for name in cls.miscellaneous_masculine_forenames if
-                    name[0].lower() == letter.lower()
-                ]
-                name = random.choice(names_that_start_with_that_letter)
-            else:
-                # Choose any name befitting the era of the person's birth
-                x = random.random()
-                name = next(
-                    name for name in probability_distribution_for_this_decade if
-                    probability_distribution_for_this_decade[name][0] <= x <=
-                    probability_distribution_for_this_decade[name][1]
-                )
-        return name
+        return cls._a_forename_starting_with(letter=letter, year=year, sex='M')
 
     @classmethod
     def a_feminine_name_starting_with(cls, letter, year):
         """Return a random feminine name starting with the given letter and befitting the given year."""
+        return cls._a_forename_starting_with(letter=letter, year=year, sex='F')
+
+    @classmethod
+    def _a_forename_starting_with(cls, letter, year, sex):
+        """Return a random forename of the given sex ('M' or 'F') starting with the given letter
+        and befitting the given year."""
         if year < 1880:
             year = 1880
         decade = int(math.floor(year/10)*10)  # Determine the current decade
-        x = random.random()
-        # Choose using the actual distribution of American names this decade
-        probability_distribution_for_this_decade = cls.names_by_decade[decade]['F']
-        try:
-            name = next(
-                name for name in probability_distribution_for_this_decade if
-                probability_distribution_for_this_decade[name][0] <= x <=
-                probability_distribution_for_this_decade[name][1] and
-                name[0].lower() == letter[0]
-            )
-        except StopIteration:
-            if random.random() < 0.5:
-                # Choose any miscellaneous name starting with the same letter
-                names_that_start_with_that_letter = [
-                    name for name in cls.miscellaneous_feminine_forenames if
-                    name[0].lower() == letter.lower()
-                ]
-                name = random.choice(names_that_start_with_that_letter)
-            else:
-                # Choose any name befitting the era of the person's birth
-                x = random.random()
-                name = next(
-                    name for name in probability_distribution_for_this_decade if
-                    probability_distribution_for_this_decade[name][0] <= x <=
-                    probability_distribution_for_this_decade[name][1]
-                )
-        return name
+        letter = letter[0].lower()
+        sampler = cls.forename_samplers_by_letter[decade][sex].get(letter)
+        if sampler:
+            # Choose using the actual distribution of American names this decade, conditioned
+            # on the name starting with this letter
+            return sampler.draw()
+        names_that_start_with_that_letter = cls.miscellaneous_forenames_by_letter[sex].get(letter)
+        if names_that_start_with_that_letter:
+            # Choose any miscellaneous name starting with the same letter
+            return random.choice(names_that_start_with_that_letter)
+        # No name we know of starts with that letter, so choose any name befitting the era
+        return cls.forename_samplers[decade][sex].draw()
 
     @classmethod
     def a_surname_sounding_like(cls, source_name):
         """Return a random surname that sounds like the source name."""
-        ethnicities = (
-            cls.english_surnames, cls.french_surnames, cls.german_surnames,
-            cls.irish_surnames, cls.scandinavian_surnames
-        )
         if '-' in source_name:
             # ButcherShop one component of the hyphenated name
             names_derived_from = source_name.split('-')
@@ -215,22 +375,19 @@ class Names(object):
                     names_derived_from[0],
                     cls.a_surname_sounding_like(source_name=component_to_butcher)
                 )
-        names_of_the_same_ethnicity = next(
-            ethnicity for ethnicity in ethnicities if str(source_name) in ethnicity
-        )
-        try:
-            name = next(
-                name for name in names_of_the_same_ethnicity if
-                name[0].lower() == source_name[0].lower()
+        first_letter = source_name[0].lower()
+        ethnicity = cls.surname_ethnicities.get(str(source_name))
+        if ethnicity:
+            names_of_the_same_ethnicity_and_letter = cls.surnames_by_ethnicity_and_letter.get(
+                (ethnicity, first_letter)
             )
-        except StopIteration:
-            try:
-                name = random.choice(names_of_the_same_ethnicity)
-            except StopIteration:
-                all_surnames_that_start_with_that_letter = [
-                    name for name in cls.all_surnames if name[0].lower() == source_name[0].lower()
-                ]
-                name = random.choice(all_surnames_that_start_with_that_letter)
+            if names_of_the_same_ethnicity_and_letter:
+                name = names_of_the_same_ethnicity_and_letter[0]
+            else:
+                name = random.choice(dict(cls.surnames_by_ethnicity)[ethnicity])
+        else:
+            # The name isn't in our corpora, so choose any surname starting with that letter
+            name = random.choice(cls.surnames_by_first_letter[first_letter])
         return name
 
     @classmethod
@@ -251,14 +408,15 @@ class Names(object):
 
 class GravestoneDetails(object):
     """A class that holds variants of various gravestone details, such as inscriptions."""
-    headers = tuple(
-        header.strip('\n') for header in
-        open(os.getcwd()+'/corpora/gravestone_headers.txt', 'r')
-    )
-    epitaphs = tuple(
-        epitaph.strip('\n') for epitaph in
-        open(os.getcwd()+'/corpora/gravestone_epitaphs.txt', 'r').read().split('\n\n')
-    )
+
+    @lazy_corpus
+    def headers(cls):
+        return lines_of_corpus('gravestone_headers.txt')
+
+    @lazy_corpus
+    def epitaphs(cls):
+        with open(path_to_corpus('gravestone_epitaphs.txt'), 'r') as corpus:
+            return tuple(epitaph.strip('\n') for epitaph in corpus.read().split('\n\n'))
 
     @classmethod
     def a_header(cls):
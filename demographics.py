@@ -0,0 +1,126 @@
+import csv
+from array import array
+
+
+class DemographicRecorder(object):
+    """A recorder of yearly demographic aggregates over the course of a simulation.
+
+    Flows (births, deaths, marriages, etc.) are tallied as the events that constitute them
+    happen, by way of Simulation.assign_event_number(), and business openings as businesses
+    are founded; stocks (population, companies, and unemployment) are recorded at the end of
+    each year, by Simulation._update_date(). Everything is stored in arrays preallocated for
+    the years of worldgen, so that charting a town's history takes time proportional to the
+    number of years, rather than requiring a scan of every simulated event.
+    """
+
+    # Maps the names of event classes to the names of the series that tally them
+    EVENT_SERIES = {
+        'Birth': 'births',
+        'Death': 'deaths',
+        'Marriage': 'marriages',
+        'Divorce': 'divorces',
+        'Departure': 'departures',
+        'BusinessClosure': 'business_closures',
+        'LayOff': 'layoffs',
+        'Retirement': 'retirements',
+    }
+    # All the series, in the order of the columns of to_csv()
+    SERIES = (
+        'population', 'births', 'deaths', 'marriages', 'divorces', 'departures', 'companies',
+        'business_openings', 'business_closures', 'unemployed', 'layoffs', 'retirements'
+    )
+
+    def __init__(self, sim):
+        """Initialize a DemographicRecorder object.
+
+        @param sim: The simulation whose demographics this object records.
+        """
+        self.sim = sim
+        self.first_year = sim.config.date_worldgen_begins[0]
+        self.number_of_years = sim.config.date_worldgen_ends[0] - self.first_year + 1
+        # Maps the name of each series to an array of its values, indexed by years since the first year
+        self.tallies = {name: array('l', [0]) * self.number_of_years for name in self.SERIES}
+        self.last_year_recorded = None  # The last year whose stocks have been recorded
+
+    def __str__(self):
+        """Return string representation."""
+        return "A demographic recorder for {first_year}-{last_year}".format(
+            first_year=self.first_year, last_year=self.sim.year
+        )
+
+    def _index_of(self, year):
+        """Return the index of this year in the arrays, extending them if need be, or None if it predates them."""
+        index = year - self.first_year
+        if index < 0:
+            return None
+        if index >= self.number_of_years:
+            # Simulation has continued past the end of worldgen
+            n_additional_years = index + 1 - self.number_of_years
+            for tally in self.tallies.itervalues():
+                tally.extend([0] * n_additional_years)
+            self.number_of_years = index + 1
+        return index
+
+    def observe_event(self, event):
+        """Tally this event, if it is of a kind that we record.
+
+        Events that are retconned into the past (e.g., the marriages and the births of the children
+        of people generated ex nihilo, which happened outside the town) are not tallied.
+        """
+        name = self.EVENT_SERIES.get(event.__class__.__name__)
+        if name and event.year == self.sim.true_year:
+            index = self._index_of(event.year)
+            if index is not None:
+                self.tallies[name][index] += 1
+
+    def observe_business_opening(self, business):
+        """Tally the founding of this business."""
+        index = self._index_of(business.founded)
+        if index is not None:
+            self.tallies['business_openings'][index] += 1
+
+    def record_end_of_year(self, year):
+        """Record the stocks (population, etc.) as of the end of the given year."""
+        index = self._index_of(year)
+        if index is not None:
+            for name, value in self._current_stocks().iteritems():
+                self.tallies[name][index] = value
+            self.last_year_recorded = year
+
+    def _current_stocks(self):
+        """Return a dictionary mapping the names of the stock series to their current values."""
+        town = self.sim.town
+        return {
+            'population': town.population,
+            'companies': len(town.companies),
+            'unemployed': len(town.unemployed),
+        }
+
+    @property
+    def years(self):
+        """Return a list of the years recorded so far, including the current one."""
+        return range(self.first_year, max(self.sim.year, self.first_year) + 1)
+
+    def series(self):
+        """Return a dictionary mapping the name of each series (and 'year') to a list of its yearly values.
+
+        The values for the current year are as of now, since it has not yet ended.
+        """
+        years = self.years
+        self._index_of(years[-1])  # Make sure the arrays extend through the current year
+        series = {name: list(self.tallies[name][:len(years)]) for name in self.SERIES}
+        if self.sim.town and self.last_year_recorded != years[-1]:
+            for name, value in self._current_stocks().iteritems():
+                series[name][-1] = value
+        series['year'] = years
+        return series
+
+    def to_csv(self, path):
+        """Write the yearly series to a CSV file at the given path, one row per year."""
+        series = self.series()
+        columns = ('year',) + self.SERIES
+        with open(path, 'wb') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(columns)
+            for i in xrange(len(series['year'])):
+                writer.writerow([series[column][i] for column in columns])
@@ -1,5 +1,17 @@
+from itertools import permutations
+from sifting import SocialGraph, Pattern, Relation, Attribute, Degree, sift_in_parallel
+
+
 class StoryRecognizer(object):
-    """A module that excavates nuggets of dramatic intrigue from the raw emergent material of a simulation instance."""
+    """A module that excavates nuggets of dramatic intrigue from the raw emergent material of a simulation instance.
+
+    Each type of story is specified as a sifting pattern (see sifting.py) that gets matched against
+    an index of the town's social graph; this index is kept up to date as relationships change.
+    """
+
+    # The relations between people that are indexed in the social graph, in the order of the
+    # tuples returned by _relationship_state()
+    INDEXED_RELATIONS = ('is_captivated_by', 'likes', 'dislikes', 'considers_a_friend')
 
     def __init__(self, simulation):
         """Initialize a StoryRecognizer object."""
@@ -12,123 +24,518 @@ class StoryRecognizer(object):
         self.rivalries = []  # Gets set by self._excavate_rivalries()
         self.sibling_rivalries = []  # Gets set by self._excavate_sibling_rivalries()
         self.business_owner_rivalries = []  # Gets set by self._excavate_business_owner_rivalries()
+        # Rather than only excavating stories once simulation has ended, we can also keep every
+        # story up to date as it emerges (or dissolves) by observing the changes to relationships,
+        # residency, marriages, and business ownership that the story patterns depend on; this
+        # maps each story class to a dictionary mapping story keys to the story objects that are
+        # currently live
+        self.current_stories = {
+            story_class: {} for story_class in (
+                UnrequitedLove, LoveTriangle, ExtramaritalRomanticInterest, AsymmetricFriendship,
+                Misanthropy, Rivalry, SiblingRivalry, BusinessOwnerRivalry
+            )
+        }
+        # Functions to call whenever a story emerges or dissolves; see subscribe()
+        self.subscribers = []
+        # Maps (owner, subject) tuples to the (captivated, likes, dislikes, friend) tuple that
+        # held for owner's relationship with subject when it was last observed; when these
+        # don't change, no story involving the pair can have changed
+        self.relationship_states = {}
+        self.observed_love_interests = {}  # Maps people to their love interests as of when last observed
+        # Maps companies to the people who own them, and people to the companies they own,
+        # for recognizing business-owner rivalries
+        self.owner_of_company = {}
+        self.companies_owned_by = {}
+        self.companies_of_type = {}  # Maps business classes to the set of companies of that class
+        self.social_graph = self._init_social_graph()
+        self.story_patterns = self._init_story_patterns()
+
+    def _init_social_graph(self):
+        """Return an empty index of the social graph, with the relations and attributes that story patterns use."""
+        simulation = self.simulation
+        social_graph = SocialGraph()
+        for relation in self.INDEXED_RELATIONS:
+            social_graph.define_indexed_relation(relation)
+        # The estimated fanouts of these relations are just rough guides for query planning
+        social_graph.define_derived_relation('is_sibling_of', lambda p: p.siblings, symmetric=True, estimated_fanout=2.0)
+        # Someone who dies still has their widow as their spouse, even once the widow has remarried, so
+        # only a spouse who has this person as their spouse in turn counts; this keeps the relation symmetric
+        social_graph.define_derived_relation(
+            'is_married_to', lambda p: (p.spouse,) if p.spouse and p.spouse.spouse is p else (), symmetric=True
+        )
+        social_graph.define_derived_relation('is_in_love_with', lambda p: (p.love_interest,))
+        social_graph.define_derived_relation(
+            'owns_business_of_same_type_as', self._owners_of_rival_businesses, symmetric=True, estimated_fanout=2.0
+        )
+        social_graph.define_attribute(
+            'resident', lambda p: p in simulation.town.residents, members=lambda: simulation.town.residents
+        )
+        social_graph.define_attribute('married', lambda p: p.spouse is not None)
+        social_graph.define_attribute(
+            'business_owner', lambda p: p in self.companies_owned_by, members=lambda: self.companies_owned_by
+        )
+        return social_graph
+
+    def _init_story_patterns(self):
+        """Return a dictionary mapping each story class to the sifting pattern that recognizes it."""
+        config = self.simulation.config
+        return {
+            UnrequitedLove: Pattern(
+                name='unrequited love', roles=('lover', 'nonreciprocator'),
+                clauses=[
+                    Attribute('lover', 'resident'),
+                    Relation('lover', 'is_captivated_by', 'nonreciprocator'),
+                    Relation('nonreciprocator', 'is_captivated_by', 'lover', negated=True),
+                ]
+            ),
+            # The same triangle will match starting from any of its members who is a resident,
+            # so we report only the first match in order of their IDs
+            LoveTriangle: Pattern(
+                name='love triangle', roles=('first_person', 'second_person', 'third_person'),
+                clauses=[
+                    Attribute('first_person', 'resident'),
+                    Relation('first_person', 'is_captivated_by', 'second_person'),
+                    Relation('second_person', 'is_captivated_by', 'first_person', negated=True),
+                    Relation('second_person', 'is_captivated_by', 'third_person'),
+                    Relation('third_person', 'is_captivated_by', 'second_person', negated=True),
+                    Relation('third_person', 'is_captivated_by', 'first_person'),
+                ],
+                deduplicate=True
+            ),
+            ExtramaritalRomanticInterest: Pattern(
+                name='extramarital romantic interest', roles=('married_person', 'love_interest'),
+                clauses=[
+                    Attribute('married_person', 'resident'),
+                    Attribute('married_person', 'married'),
+                    Relation('married_person', 'is_in_love_with', 'love_interest'),
+                    Relation('married_person', 'is_married_to', 'love_interest', negated=True),
+                ]
+            ),
+            AsymmetricFriendship: Pattern(
+                name='asymmetric friendship', roles=('friend', 'enemy'),
+                clauses=[
+                    Attribute('friend', 'resident'),
+                    Relation('friend', 'considers_a_friend', 'enemy'),
+                    Relation('enemy', 'dislikes', 'friend'),
+                ]
+            ),
+            Misanthropy: Pattern(
+                name='misanthropy', roles=('misanthrope',),
+                clauses=[
+                    Attribute('misanthrope', 'resident'),
+                    Degree('misanthrope', 'dislikes', at_least=config.minimum_number_of_disliked_people_to_be_misanthrope),
+                ]
+            ),
+            # Rivalries are symmetric, and they only require one of the two to be a resident
+            Rivalry: Pattern(
+                name='rivalry', roles=('person', 'other_person'),
+                clauses=[
+                    Attribute('person', 'resident'),
+                    Relation('person', 'dislikes', 'other_person'),
+                    Relation('other_person', 'dislikes', 'person'),
+                ],
+                deduplicate=True
+            ),
+            SiblingRivalry: Pattern(
+                name='sibling rivalry', roles=('person', 'sibling'),
+                clauses=[
+                    Attribute('person', 'resident'),
+                    Relation('person', 'is_sibling_of', 'sibling'),
+                    Relation('person', 'dislikes', 'sibling'),
+                    Relation('sibling', 'dislikes', 'person'),
+                ],
+                deduplicate=True
+            ),
+            BusinessOwnerRivalry: Pattern(
+                name='business-owner rivalry', roles=('owner', 'rival_owner'),
+                clauses=[
+                    Attribute('owner', 'business_owner'),
+                    Relation('owner', 'owns_business_of_same_type_as', 'rival_owner'),
+                    Relation('owner', 'likes', 'rival_owner', negated=True),
+                    Relation('rival_owner', 'likes', 'owner', negated=True),
+                ],
+                deduplicate=True
+            ),
+        }
 
     def __str__(self):
         """Return string representation."""
         return "A story-recognition module for the town of {town_name}".format(town_name=self.simulation.town.name)
 
-    def excavate(self):
-        """Excavate and record nuggets of dramatic intrigue."""
-        self.unrequited_love_cases = self._excavate_unrequited_love_cases()
+    def excavate(self, parallel=None):
+        """Excavate and record nuggets of dramatic intrigue.
+
+        @param parallel: If a number greater than 1, the story patterns will be sifted by that many
+                         worker processes, over a read-only snapshot of the social graph; the stories
+                         found, and their order, are the same either way.
+        """
+        if not self.simulation.config.recognize_stories_incrementally:
+            # The social graph has not been kept up to date during simulation
+            self._index_social_graph()
+        matches = self._sift_in_parallel(processes=parallel) if parallel and parallel > 1 else {}
+        self.unrequited_love_cases = self._excavate_unrequited_love_cases(matches=matches.get(UnrequitedLove))
         print "\tFound {n} cases of unrequited love".format(n=len(self.unrequited_love_cases))
-        self.love_triangles = self._excavate_love_triangles()
+        self.love_triangles = self._excavate_love_triangles(matches=matches.get(LoveTriangle))
         print "\tFound {n} love triangles".format(n=len(self.love_triangles))
-        self.extramarital_romantic_interests = self._excavate_extramarital_romantic_interests()
+        self.extramarital_romantic_interests = self._excavate_extramarital_romantic_interests(
+            matches=matches.get(ExtramaritalRomanticInterest)
+        )
         print "\tFound {n} cases of extramarital romantic interest".format(n=len(self.extramarital_romantic_interests))
-        self.asymmetric_friendships = self._excavate_asymmetric_friendships()
+        self.asymmetric_friendships = self._excavate_asymmetric_friendships(matches=matches.get(AsymmetricFriendship))
         print "\tFound {n} asymmetric friendships".format(n=len(self.asymmetric_friendships))
-        self.misanthropes = self._excavate_misanthropes()
+        self.misanthropes = self._excavate_misanthropes(matches=matches.get(Misanthropy))
         print "\tFound {n} misanthropes".format(n=len(self.misanthropes))
-        self.rivalries = self._excavate_rivalries()
+        self.rivalries = self._excavate_rivalries(matches=matches.get(Rivalry))
         print "\tFound {n} character rivalries".format(n=len(self.rivalries))
-        self.sibling_rivalries = self._excavate_sibling_rivalries()
+        self.sibling_rivalries = self._excavate_sibling_rivalries(matches=matches.get(SiblingRivalry))
         print "\tFound {n} sibling rivalries".format(n=len(self.sibling_rivalries))
-        self.business_owner_rivalries = self._excavate_business_owner_rivalries()
+        self.business_owner_rivalries = self._excavate_business_owner_rivalries(
+            matches=matches.get(BusinessOwnerRivalry)
+        )
         print "\tFound {n} business-owner rivalries".format(n=len(self.business_owner_rivalries))
 
-    def _excavate_unrequited_love_cases(self):
+    def subscribe(self, callback):
+        """Have the given function be called as callback(story, emerged=True/False) whenever a
+        story emerges or dissolves during simulation."""
+        self.subscribers.append(callback)
+
+    def current(self, story_class):
+        """Return a list of the stories of the given class (e.g., Rivalry) that are currently live."""
+        return self.current_stories[story_class].values()
+
+    def sift(self, pattern):
+        """Return a list of tuples of the people matching the given sifting pattern, in order of their IDs."""
+        return self._people_in(matches=self.social_graph.sift(pattern))
+
+    def _people_in(self, matches):
+        """Return a list of tuples of people corresponding to these tuples of person IDs."""
+        people = self.social_graph.people
+        return [tuple(people[person_id] for person_id in match) for match in matches]
+
+    def _matches(self, story_class, matches=None):
+        """Return the given matches for the pattern of this story class, or, if None, sift for them."""
+        return self.sift(self.story_patterns[story_class]) if matches is None else matches
+
+    def _sift_in_parallel(self, processes):
+        """Return a dictionary mapping each story class to the matches for its pattern, as sifted by a
+        pool of worker processes from a snapshot of the social graph."""
+        # Order the patterns by name, so that the same tasks are handed out in the same order every time
+        story_classes = sorted(self.story_patterns, key=lambda story_class: story_class.__name__)
+        all_matches = sift_in_parallel(
+            snapshot=self.social_graph.snapshot(),
+            patterns=[self.story_patterns[story_class] for story_class in story_classes],
+            processes=min(processes, len(story_classes))
+        )
+        return {
+            story_class: self._people_in(matches=matches) for story_class, matches in zip(story_classes, all_matches)
+        }
+
+    def _index_social_graph(self):
+        """Index the town's social graph and business ownership from scratch."""
+        self.social_graph = self._init_social_graph()
+        self.owner_of_company, self.companies_owned_by, self.companies_of_type = {}, {}, {}
+        # Relationships held in the archive are read from it, rather than rehydrating anyone
+        relationships_of = self.simulation.archive.relationships_of(people=self.simulation.town.all_time_residents)
+        for person, relationships in relationships_of.iteritems():
+            for other_person, relationship in relationships.iteritems():
+                state = self._relationship_state(owner=person, subject=other_person, relationship=relationship)
+                for relation, holds in zip(self.INDEXED_RELATIONS, state):
+                    if holds:
+                        self.social_graph.relate(relation, person, other_person)
+        for company in self.simulation.town.companies:
+            self._register_ownership(company=company)
+
+    def _relationship_state(self, owner, subject, relationship):
+        """Return a (captivated, likes, dislikes, friend) tuple characterizing owner's relationship with subject."""
+        config = self.simulation.config
+        return (
+            relationship.spark > config.spark_threshold_for_being_captivated,
+            relationship.charge > config.charge_threshold_for_liking_someone,
+            relationship.charge < config.charge_threshold_for_disliking_someone,
+            subject in owner.friends
+        )
+
+    def observe_relationship(self, owner, subject):
+        """Update the stories involving these two people to reflect owner's current relationship with subject.
+
+        This gets called whenever a relationship is formed or its charge or spark changes.
+        """
+        if not self.simulation.config.recognize_stories_incrementally:
+            return
+        # Owner may have a new love interest as a result of this change
+        if owner.love_interest is not self.observed_love_interests.get(owner):
+            self.observed_love_interests[owner] = owner.love_interest
+            self._recognize_extramarital_romantic_interest(person=owner)
+        state = self._relationship_state(owner=owner, subject=subject, relationship=owner.relationships[subject])
+        old_state = self.relationship_states.get((owner, subject), (False, False, False, False))
+        if state == old_state:
+            return
+        self.relationship_states[(owner, subject)] = state
+        for relation, holds, held in zip(self.INDEXED_RELATIONS, state, old_state):
+            if holds != held:
+                self.social_graph.relate(relation, owner, subject, holds=holds)
+        captivated, _, dislikes, _ = state
+        if captivated != old_state[0]:
+            self._recognize_unrequited_love(lover=owner, nonreciprocator=subject)
+            self._recognize_unrequited_love(lover=subject, nonreciprocator=owner)
+            # Any love triangle including both these people will also include someone whom
+            # each of them has a romantic tie to
+            for third_person in self._romantic_ties_of(owner) & self._romantic_ties_of(subject):
+                self._recognize_love_triangle(people=(owner, subject, third_person))
+        if dislikes != old_state[2]:
+            self._recognize_misanthropy(person=owner)
+        self._recognize_asymmetric_friendship(friend=owner, enemy=subject)
+        self._recognize_asymmetric_friendship(friend=subject, enemy=owner)
+        self._recognize_rivalries(person=owner, other_person=subject)
+        if owner in self.companies_owned_by and subject in self.companies_owned_by:
+            self._recognize_business_owner_rivalry(owner=owner, other_owner=subject)
+
+    def observe_person(self, person):
+        """Update the stories involving this person to reflect their current residency and marital status.
+
+        This gets called whenever someone moves into or out of the town, dies, marries, or divorces.
+        """
+        if not self.simulation.config.recognize_stories_incrementally:
+            return
+        self._recognize_extramarital_romantic_interest(person=person)
+        self._recognize_misanthropy(person=person)
+        for love_interest in person.captivations:
+            self._recognize_unrequited_love(lover=person, nonreciprocator=love_interest)
+        for friend in person.friends:
+            self._recognize_asymmetric_friendship(friend=person, enemy=friend)
+        # Rivalries are found by way of the social graph rather than this person's relationships,
+        # since their relationships with anyone who has been archived are set aside (see PersonArchive)
+        social_graph = self.social_graph
+        for other_person_id in (
+            social_graph.successors('dislikes', person.id) | social_graph.successors('dislikes', person.id, inverse=True)
+        ):
+            self._recognize_rivalries(person=person, other_person=social_graph.people[other_person_id])
+        romantic_ties = self._romantic_ties_of(person)
+        for second_person in romantic_ties:
+            for third_person in romantic_ties & self._romantic_ties_of(second_person):
+                self._recognize_love_triangle(people=(person, second_person, third_person))
+
+    def observe_company(self, company):
+        """Update the business-owner rivalries involving this company to reflect its current ownership.
+
+        This gets called whenever a company is founded, changes owners, or goes out of business.
+        """
+        if not self.simulation.config.recognize_stories_incrementally:
+            return
+        affected_owners = self._register_ownership(company=company)
+        for owner in affected_owners:
+            for rival_company in self.companies_of_type[company.__class__]:
+                self._recognize_business_owner_rivalry(
+                    owner=owner, other_owner=self.owner_of_company[rival_company]
+                )
+
+    def _register_ownership(self, company):
+        """Update the business-type registry to reflect this company's current ownership, and return
+        the set of people whose ownership of it has changed."""
+        affected_owners = set()
+        former_owner = self.owner_of_company.pop(company, None)
+        if former_owner:
+            affected_owners.add(former_owner)
+            self.companies_owned_by[former_owner].remove(company)
+            if not self.companies_owned_by[former_owner]:
+                del self.companies_owned_by[former_owner]
+        companies_of_this_type = self.companies_of_type.setdefault(company.__class__, set())
+        companies_of_this_type.discard(company)
+        if company in self.simulation.town.companies and company.owner:
+            owner = company.owner.person
+            affected_owners.add(owner)
+            self.owner_of_company[company] = owner
+            self.companies_owned_by.setdefault(owner, set()).add(company)
+            companies_of_this_type.add(company)
+        return affected_owners
+
+    def _owners_of_rival_businesses(self, person):
+        """Return the set of other people who own a business of the same type as one that this person owns."""
+        rival_owners = set()
+        for company in self.companies_owned_by.get(person, ()):
+            for rival_company in self.companies_of_type[company.__class__]:
+                rival_owners.add(self.owner_of_company[rival_company])
+        rival_owners.discard(person)
+        return rival_owners
+
+    def _rival_companies(self, owner, other_owner):
+        """Return the first (by ID) pair of companies of the same type that are owned by these two
+        people, respectively, or None if there is no such pair."""
+        other_owners_companies = sorted(self.companies_owned_by.get(other_owner, ()), key=lambda c: c.id)
+        for company in sorted(self.companies_owned_by.get(owner, ()), key=lambda c: c.id):
+            for rival_company in other_owners_companies:
+                if rival_company.__class__ is company.__class__:
+                    return company, rival_company
+        return None
+
+    @staticmethod
+    def _romantic_ties_of(person):
+        """Return the set of people whom this person is captivated by or who are captivated by this person."""
+        return person.captivations | person.admirers
+
+    @staticmethod
+    def _is_captivated_by(person, other_person):
+        """Return whether person is captivated by other_person."""
+        return other_person in person.captivations
+
+    def _dislikes(self, person, other_person):
+        """Return whether person dislikes other_person, as of when it was last observed."""
+        return self.social_graph.holds('dislikes', person.id, other_person.id)
+
+    def _likes(self, person, other_person):
+        """Return whether person likes other_person, as of when it was last observed."""
+        return self.social_graph.holds('likes', person.id, other_person.id)
+
+    def _update_story(self, story_class, key, subjects, **kwargs):
+        """Record that the story with the given key holds among these subjects, or, if subjects
+        is None, that it no longer holds; subscribers are notified of any change."""
+        stories = self.current_stories[story_class]
+        story = stories.get(key)
+        if story and story.subjects != subjects:
+            del stories[key]
+            for callback in self.subscribers:
+                callback(story, emerged=False)
+            story = None
+        if subjects and not story:
+            story = stories[key] = story_class(subjects=subjects, **kwargs)
+            for callback in self.subscribers:
+                callback(story, emerged=True)
+
+    def _recognize_unrequited_love(self, lover, nonreciprocator):
+        """Recognize whether lover's love for nonreciprocator is currently unrequited."""
+        holds = (
+            lover in self.simulation.town.residents and self._is_captivated_by(lover, nonreciprocator) and
+            not self._is_captivated_by(nonreciprocator, lover)
+        )
+        self._update_story(
+            UnrequitedLove, key=(lover, nonreciprocator), subjects=(lover, nonreciprocator) if holds else None
+        )
+
+    def _recognize_love_triangle(self, people):
+        """Recognize whether a love triangle is currently constituted across these three people."""
+        residents = self.simulation.town.residents
+        subjects = None
+        for first_person, second_person, third_person in permutations(sorted(people, key=lambda p: p.id)):
+            if (
+                first_person in residents and
+                self._is_captivated_by(first_person, second_person) and
+                not self._is_captivated_by(second_person, first_person) and
+                self._is_captivated_by(second_person, third_person) and
+                not self._is_captivated_by(third_person, second_person) and
+                self._is_captivated_by(third_person, first_person)
+            ):
+                subjects = (first_person, second_person, third_person)
+                break
+        self._update_story(LoveTriangle, key=frozenset(people), subjects=subjects)
+
+    def _recognize_extramarital_romantic_interest(self, person):
+        """Recognize whether this person is currently married but in love with someone else."""
+        holds = (
+            person.spouse and person.love_interest and person.love_interest is not person.spouse and
+            person in self.simulation.town.residents
+        )
+        self._update_story(
+            ExtramaritalRomanticInterest, key=person, subjects=(person, person.love_interest) if holds else None
+        )
+
+    def _recognize_asymmetric_friendship(self, friend, enemy):
+        """Recognize whether friend currently considers enemy a friend while enemy dislikes them."""
+        holds = (
+            friend in self.simulation.town.residents and enemy in friend.friends and self._dislikes(enemy, friend)
+        )
+        self._update_story(AsymmetricFriendship, key=(friend, enemy), subjects=(friend, enemy) if holds else None)
+
+    def _recognize_misanthropy(self, person):
+        """Recognize whether this person currently dislikes enough people to be a misanthrope."""
+        holds = (
+            person in self.simulation.town.residents and
+            self.social_graph.degree('dislikes', person.id) >=
+            self.simulation.config.minimum_number_of_disliked_people_to_be_misanthrope
+        )
+        self._update_story(Misanthropy, key=person, subjects=(person,) if holds else None)
+
+    def _recognize_rivalries(self, person, other_person):
+        """Recognize both a plain rivalry and a sibling rivalry between these two people."""
+        residents = self.simulation.town.residents
+        holds = (
+            (person in residents or other_person in residents) and
+            self._dislikes(person, other_person) and self._dislikes(other_person, person)
+        )
+        subjects = self._ordered_pair(person, other_person) if holds else None
+        key = frozenset((person, other_person))
+        self._update_story(Rivalry, key=key, subjects=subjects)
+        self._update_story(
+            SiblingRivalry, key=key, subjects=subjects if holds and other_person in person.siblings else None
+        )
+
+    def _recognize_business_owner_rivalry(self, owner, other_owner):
+        """Recognize whether these two people currently own rival businesses and do not like each other."""
+        if owner is other_owner:
+            return
+        subjects, companies = None, None
+        if not self._likes(owner, other_owner) and not self._likes(other_owner, owner):
+            subjects = self._ordered_pair(owner, other_owner)
+            companies = self._rival_companies(*subjects)
+            if not companies:
+                subjects = None
+        self._update_story(
+            BusinessOwnerRivalry, key=frozenset((owner, other_owner)), subjects=subjects, companies=companies
+        )
+
+    def _excavate_unrequited_love_cases(self, matches=None):
         """Recognize cases where one character's love for another is not reciprocated."""
-        unrequited_love_cases = []
-        for first_person in self.simulation.town.residents:
-            first_person_love_interests = set(first_person.is_captivated_by)
-            for second_person in first_person_love_interests:
-                second_person_love_interests = set(second_person.is_captivated_by)
-                if first_person not in second_person_love_interests:
-                    unrequited_love_cases.append(UnrequitedLove(subjects=(first_person, second_person)))
-        return unrequited_love_cases
-
-    def _excavate_love_triangles(self):
+        return [UnrequitedLove(subjects=subjects) for subjects in self._matches(UnrequitedLove, matches)]
+
+    def _excavate_love_triangles(self, matches=None):
         """Recognize character love triangles that have emerged in a simulation instance."""
-        love_triangles = []
-        for first_person in self.simulation.town.residents:
-            first_person_love_interests = set(first_person.is_captivated_by)
-            for second_person in first_person_love_interests:
-                second_person_love_interests = set(second_person.is_captivated_by)
-                if first_person not in second_person_love_interests:
-                    for third_person in second_person_love_interests:
-                        third_person_love_interests = set(third_person.is_captivated_by)
-                        if second_person not in third_person_love_interests:
-                            if first_person in third_person_love_interests:
-                                subjects = (first_person, second_person, third_person)
-                                if not any(lt for lt in love_triangles if set(lt.subjects) == set(subjects)):
-                                    love_triangles.append(LoveTriangle(subjects=subjects))
-        return love_triangles
-
-    def _excavate_extramarital_romantic_interests(self):
+        return [LoveTriangle(subjects=subjects) for subjects in self._matches(LoveTriangle, matches)]
+
+    def _excavate_extramarital_romantic_interests(self, matches=None):
         """Excavate cases where married characters are in love with people they are not married to."""
-        extramarital_romantic_interests = []
-        for person in self.simulation.town.residents:
-            if person.spouse and person.love_interest is not person.spouse:
-                subjects = (person, person.love_interest)
-                extramarital_romantic_interests.append(ExtramaritalRomanticInterest(subjects=subjects))
-        return extramarital_romantic_interests
-
-    def _excavate_asymmetric_friendships(self):
+        return [
+            ExtramaritalRomanticInterest(subjects=subjects) for subjects in
+            self._matches(ExtramaritalRomanticInterest, matches)
+        ]
+
+    def _excavate_asymmetric_friendships(self, matches=None):
         """Recognizes cases where a character A considers another, B, to be a friend,
         while B considers A to be an enemy.
         """
-        asymmetric_friendships = []
-        for person in self.simulation.town.residents:
-            for friend in person.friends:
-                if friend.dislikes(person):
-                    asymmetric_friendships.append(AsymmetricFriendship(subjects=(person, friend)))
-        return asymmetric_friendships
-
-    def _excavate_misanthropes(self):
+        return [
+            AsymmetricFriendship(subjects=subjects) for subjects in self._matches(AsymmetricFriendship, matches)
+        ]
+
+    def _excavate_misanthropes(self, matches=None):
         """Recognizes cases of characters who dislike many other characters."""
-        misanthropes = []
-        threshold_for_misanthropy = self.simulation.config.minimum_number_of_disliked_people_to_be_misanthrope
-        for person in self.simulation.town.residents:
-            number_of_disliked_people = len([p for p in person.relationships if person.dislikes(p)])
-            if number_of_disliked_people >= threshold_for_misanthropy:
-                misanthropes.append(Misanthropy(subjects=(person,)))
-        return misanthropes
-
-    def _excavate_rivalries(self):
+        return [Misanthropy(subjects=subjects) for subjects in self._matches(Misanthropy, matches)]
+
+    def _excavate_rivalries(self, matches=None):
         """Recognize cases where mutual animosity exists between a pair of characters."""
-        rivalries = []
-        for person in self.simulation.town.residents:
-            for other_person in person.relationships:
-                if person.dislikes(other_person) and other_person.dislikes(person):
-                    subjects = (person, other_person)
-                    if not any(r for r in self.rivalries if set(r.subjects) == set(subjects)):
-                        rivalries.append(Rivalry(subjects=subjects))
-        return rivalries
-
-    def _excavate_sibling_rivalries(self):
+        return [
+            Rivalry(subjects=self._ordered_pair(*subjects)) for subjects in self._matches(Rivalry, matches)
+        ]
+
+    def _excavate_sibling_rivalries(self, matches=None):
         """Recognize cases where mutual animosity exists between a pair of siblings."""
-        sibling_rivalries = []
-        for person in self.simulation.town.residents:
-            for sibling in person.siblings:
-                if person.dislikes(sibling) and sibling.dislikes(person):
-                    subjects = (person, sibling)
-                    if not any(sr for sr in self.sibling_rivalries if set(sr.subjects) == set(subjects)):
-                        sibling_rivalries.append(SiblingRivalry(subjects=subjects))
-        return sibling_rivalries
-
-    def _excavate_business_owner_rivalries(self):
+        return [
+            SiblingRivalry(subjects=self._ordered_pair(*subjects)) for subjects in
+            self._matches(SiblingRivalry, matches)
+        ]
+
+    def _excavate_business_owner_rivalries(self, matches=None):
         """Recognize cases where mutual animosity exists between owners of rival businesses."""
         business_owner_rivalries = []
-        for company in self.simulation.town.companies:
-            for rival_company in self.simulation.town.businesses_of_type(business_type=company.__class__.__name__):
-                if rival_company is not company and rival_company.owner and company.owner:
-                    if not company.owner.person.likes(rival_company.owner.person):
-                        if not rival_company.owner.person.likes(company.owner.person):
-                            subjects = (company.owner.person, rival_company.owner.person)
-                            if not any(br for br in self.business_owner_rivalries if set(br.subjects) == set(subjects)):
-                                business_owner_rivalries.append(BusinessOwnerRivalry(subjects=subjects))
+        for subjects in self._matches(BusinessOwnerRivalry, matches):
+            subjects = self._ordered_pair(*subjects)
+            companies = self._rival_companies(*subjects)
+            business_owner_rivalries.append(BusinessOwnerRivalry(subjects=subjects, companies=companies))
         return business_owner_rivalries
 
+    @staticmethod
+    def _ordered_pair(person, other_person):
+        """Return a tuple of these two people ordered by their IDs."""
+        return (person, other_person) if person.id < other_person.id else (other_person, person)
+
 
 class UnrequitedLove(object):
     """A case of one character's love not being reciprocated by a second character."""
@@ -283,13 +690,18 @@ class SiblingRivalry(object):
 class BusinessOwnerRivalry(object):
     """A case of animosity between owners of rival companies."""
 
-    def __init__(self, subjects):
+    def __init__(self, subjects, companies=None):
         """Initialize a BusinessOwnerRivalry object.
 
         @param subjects: The owners of the respective businesses.
+        @param companies: The rival businesses, in the same order as their owners; if None,
+                          the companies the owners currently work for will be used.
         """
         self.subjects = subjects
-        self.companies = [subjects[0].occupation.company, subjects[1].occupation.company]
+        if companies:
+            self.companies = list(companies)
+        else:
+            self.companies = [subjects[0].occupation.company, subjects[1].occupation.company]
         self.industry = self.companies[0].__class__.__name__
 
     def __str__(self):
@@ -298,8 +710,8 @@ class BusinessOwnerRivalry(object):
             "A case of animosity between business owners: {first_owner}, owner of {first_company}, "
             "is a heated rival of {second_owner}, owner of {second_company}".format(
                 first_owner=self.subjects[0].name,
-                first_company=self.subjects[0].occupation.company.name,
+                first_company=self.companies[0].name,
                 second_owner=self.subjects[1].name,
-                second_company=self.subjects[1].occupation.company.name
+                second_company=self.companies[1].name
             )
         )
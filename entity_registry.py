@@ -0,0 +1,62 @@
+import weakref
+
+
+class EntityRegistry(object):
+    """A registry that resolves the persistent IDs of the entities in a simulation.
+
+    People and places (businesses and dwelling places) are given persistent integer IDs by
+    the simulation, and lots (including tracts), parcels, and streets are given them by their
+    classes; these IDs are what the town exporters (e.g., Town.get_lots()) emit, and this
+    object resolves them back to the entities themselves. Because each kind of entity is
+    numbered separately, IDs are registered and resolved per kind.
+
+    The registry holds only weak references, so that it never keeps alive an entity that
+    nothing else in the simulation refers to anymore (e.g., a parcel that was generated
+    but not kept during town generation).
+    """
+
+    KINDS = ('person', 'place', 'lot', 'parcel', 'street')
+
+    def __init__(self, sim):
+        """Initialize an EntityRegistry object.
+
+        @param sim: The simulation whose entities this object registers.
+        """
+        self.sim = sim
+        # Maps each kind of entity to a weak-valued dictionary mapping IDs to entities
+        self.entities = {kind: weakref.WeakValueDictionary() for kind in self.KINDS}
+
+    def register(self, kind, entity):
+        """Register an entity of the given kind under its persistent ID."""
+        self.entities[kind][entity.id] = entity
+
+    def resolve(self, kind, entity_id):
+        """Return the entity of the given kind with the given persistent ID."""
+        try:
+            return self.entities[kind][entity_id]
+        except KeyError:
+            raise Exception('There is no {} with ID {}'.format(kind, entity_id))
+
+    def person(self, person_id):
+        """Return the person with the given persistent ID."""
+        return self.resolve(kind='person', entity_id=person_id)
+
+    def place(self, place_id):
+        """Return the business or dwelling place with the given persistent ID."""
+        return self.resolve(kind='place', entity_id=place_id)
+
+    def lot(self, lot_id):
+        """Return the lot or tract with the given persistent ID."""
+        return self.resolve(kind='lot', entity_id=lot_id)
+
+    def parcel(self, parcel_id):
+        """Return the parcel with the given persistent ID."""
+        return self.resolve(kind='parcel', entity_id=parcel_id)
+
+    def street(self, street_id):
+        """Return the street with the given persistent ID."""
+        return self.resolve(kind='street', entity_id=street_id)
+
+    def all_of_kind(self, kind):
+        """Return a list of all the registered entities of the given kind, in order of ID."""
+        return [entity for _, entity in sorted(self.entities[kind].items())]
@@ -72,13 +72,10 @@ class Face(object):
         """Generate a facial feature for a person given that feature's population distribution."""
         config = self.person.sim.config
         if self.person.male:
-            distribution = config.facial_feature_distributions_male[feature_type]
+            sampler = config.facial_feature_samplers_male[feature_type]
         else:
-            distribution = config.facial_feature_distributions_female[feature_type]
-        x = random.random()
-        type_str = next(  # See config.py to understand what this is doing
-            feature_type[1] for feature_type in distribution if feature_type[0][0] < x < feature_type[0][1]
-        )
+            sampler = config.facial_feature_samplers_female[feature_type]
+        type_str = sampler.draw()  # See config.py and utils.Sampler to understand what this is doing
         variant_id = int(random.random() * 1000)
         return type_str, variant_id
 
@@ -0,0 +1,306 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class TownHistory(object):
+    """A temporal record of who lived in the town, who lived in each dwelling place, and who owned each company.
+
+    Since the simulation mutates its state in place, questions like "who lived in the town in
+    1910?" could not otherwise be answered once worldgen has moved on. This object logs every
+    change to these facts, stamped with the ordinal date on which it happened, and periodically
+    takes a snapshot of them, so that the state as of the end of any past day can be
+    reconstructed by loading the nearest earlier snapshot and replaying the changes logged
+    since. Most snapshots are deltas that hold only the changes since the snapshot before
+    them; every so often, a snapshot is a keyframe that holds the full state. To bound memory,
+    the oldest snapshots (and the changes logged before them) may be discarded, in which case
+    the history before the earliest remaining snapshot can no longer be queried.
+
+    For the common questions -- who lived in the town, who lived in a given home, and who owned
+    a given company on a given date -- there are methods that avoid reconstructing everything.
+    """
+
+    # The kinds of facts that are recorded
+    RESIDENCY = 'residency'  # Keys are person IDs, values are whether they live in the town
+    OCCUPANCY = 'occupancy'  # Keys are (place ID, person ID) tuples, values are whether they live there
+    OWNERSHIP = 'ownership'  # Keys are company IDs, values are the IDs of their owners (None if none)
+    DEFAULT_VALUES = {RESIDENCY: False, OCCUPANCY: False, OWNERSHIP: None}
+
+    def __init__(self, sim):
+        """Initialize a TownHistory object.
+
+        @param sim: The simulation whose history this object records.
+        """
+        self.sim = sim
+        config = sim.config
+        self.snapshot_interval = config.history_snapshot_interval_in_days
+        self.snapshots_per_keyframe = config.history_snapshots_per_keyframe
+        self.max_snapshots = config.history_max_snapshots
+        # The current value of every fact whose value is not the default, by kind
+        self.state = {kind: {} for kind in self.DEFAULT_VALUES}
+        # The changes since the last snapshot, by kind, which will constitute the next delta snapshot
+        self.pending_changes = {kind: {} for kind in self.DEFAULT_VALUES}
+        # The log of changes, as (kind, key, value) tuples, with a parallel array of their dates
+        self.changes = []
+        self.change_dates = array('l')
+        self.n_changes_discarded = 0  # Positions in the log are offset by this many discarded changes
+        self.snapshots = []
+        self.snapshot_dates = []  # Parallel to self.snapshots, for binary search
+        self.n_snapshots_since_keyframe = None  # None until the first keyframe is taken
+        # Maps each kind of fact to a dictionary mapping the ID of the person (residency), place
+        # (occupancy), or company (ownership) that it concerns to a list of (ordinal_date, value)
+        # or, for occupancy, (ordinal_date, person_id, value) tuples, in order of date
+        self.timelines = {kind: {} for kind in self.DEFAULT_VALUES}
+        self.earliest_queryable_date = sim.ordinal_date
+
+    def __str__(self):
+        """Return string representation."""
+        return "A history of {n_changes} changes with {n_snapshots} snapshots".format(
+            n_changes=len(self.changes), n_snapshots=len(self.snapshots)
+        )
+
+    def observe_residency(self, person):
+        """Record whether this person currently lives in the town."""
+        self._record(
+            kind=self.RESIDENCY, key=person.id, value=person in self.sim.town.residents,
+            entity_id=person.id, entry=None
+        )
+
+    def observe_occupancy(self, place, person):
+        """Record whether this person currently lives in this dwelling place."""
+        moved_in = person in place.residents
+        self._record(
+            kind=self.OCCUPANCY, key=(place.id, person.id), value=moved_in,
+            entity_id=place.id, entry=(self.sim.ordinal_date, person.id, moved_in)
+        )
+
+    def observe_ownership(self, company):
+        """Record who currently owns this company (nobody, if it has gone out of business)."""
+        owner_id = company.owner.person.id if company.owner and company in self.sim.town.companies else None
+        self._record(kind=self.OWNERSHIP, key=company.id, value=owner_id, entity_id=company.id, entry=None)
+
+    def _record(self, kind, key, value, entity_id, entry):
+        """Log a change to the value of a fact, if it has indeed changed.
+
+        @param entry: The tuple to append to the timeline of the entity that the fact concerns;
+                      if None, an (ordinal_date, value) tuple will be appended.
+        """
+        state, default_value = self.state[kind], self.DEFAULT_VALUES[kind]
+        if state.get(key, default_value) == value:
+            return
+        if value == default_value:
+            del state[key]
+        else:
+            state[key] = value
+        self.pending_changes[kind][key] = value
+        self.changes.append((kind, key, value))
+        self.change_dates.append(self.sim.ordinal_date)
+        self.timelines[kind].setdefault(entity_id, []).append(entry or (self.sim.ordinal_date, value))
+
+    def potentially_take_snapshot(self):
+        """Take a snapshot of the state as of the end of today, if enough time has passed since the last one.
+
+        This gets called by Simulation._update_date() at the end of each day.
+        """
+        if not self.snapshot_interval:
+            return
+        last_snapshot_date = self.snapshot_dates[-1] if self.snapshots else self.earliest_queryable_date
+        if self.sim.ordinal_date - last_snapshot_date >= self.snapshot_interval:
+            self.take_snapshot()
+
+    def take_snapshot(self):
+        """Take a snapshot of the state as of now."""
+        if self.n_snapshots_since_keyframe is None or self.n_snapshots_since_keyframe >= self.snapshots_per_keyframe - 1:
+            snapshot = HistorySnapshot(
+                ordinal_date=self.sim.ordinal_date, keyframe=True,
+                facts={kind: dict(facts) for kind, facts in self.state.iteritems()},
+                log_position=self.n_changes_discarded + len(self.changes)
+            )
+            self.n_snapshots_since_keyframe = 0
+        else:
+            snapshot = HistorySnapshot(
+                ordinal_date=self.sim.ordinal_date, keyframe=False, facts=self.pending_changes,
+                log_position=self.n_changes_discarded + len(self.changes)
+            )
+            self.n_snapshots_since_keyframe += 1
+        self.pending_changes = {kind: {} for kind in self.DEFAULT_VALUES}
+        self.snapshots.append(snapshot)
+        self.snapshot_dates.append(snapshot.ordinal_date)
+        if self.max_snapshots and len(self.snapshots) > self.max_snapshots:
+            self._discard_oldest_snapshots()
+
+    def _discard_oldest_snapshots(self):
+        """Discard the oldest keyframe and the delta snapshots that depend on it, along with the changes
+        logged before the next keyframe, which becomes the earliest point that can be queried."""
+        next_keyframe_index = next((i for i, s in enumerate(self.snapshots) if s.keyframe and i > 0), None)
+        if next_keyframe_index is None:
+            return  # There is only one keyframe, so nothing can be discarded yet
+        del self.snapshots[:next_keyframe_index]
+        del self.snapshot_dates[:next_keyframe_index]
+        earliest_snapshot = self.snapshots[0]
+        n_changes_to_discard = earliest_snapshot.log_position - self.n_changes_discarded
+        del self.changes[:n_changes_to_discard]
+        del self.change_dates[:n_changes_to_discard]
+        self.n_changes_discarded = earliest_snapshot.log_position
+        self.earliest_queryable_date = earliest_snapshot.ordinal_date
+        # Trim the timelines too, replacing the entries from before the cutoff with ones giving
+        # the state as of the cutoff: for residency and ownership, this is the last such entry,
+        # but for occupancy, it takes an entry for each person who still lived in the place
+        cutoff = self.earliest_queryable_date
+        for kind, timelines in self.timelines.iteritems():
+            for entity_id, timeline in timelines.items():
+                end = bisect_left(timeline, (cutoff+1,))
+                if kind != self.OCCUPANCY:
+                    del timeline[:max(0, end-1)]
+                else:
+                    occupant_ids = set()
+                    for _, person_id, moved_in in timeline[:end]:
+                        if moved_in:
+                            occupant_ids.add(person_id)
+                        else:
+                            occupant_ids.discard(person_id)
+                    timeline[:end] = [(cutoff, person_id, True) for person_id in sorted(occupant_ids)]
+
+    def _check_date(self, ordinal_date):
+        """Raise an exception if the state as of the given date cannot be queried."""
+        if ordinal_date < self.earliest_queryable_date:
+            raise Exception(
+                "The history before ordinal date {} has been discarded".format(self.earliest_queryable_date)
+            )
+        if ordinal_date > self.sim.ordinal_date:
+            raise Exception("Ordinal date {} has not happened yet".format(ordinal_date))
+
+    def facts_at(self, ordinal_date, kinds=None):
+        """Return a dictionary mapping each kind of fact to a dictionary mapping the keys of all the facts
+        of that kind that did not have their default value as of the end of the given day to their values.
+
+        @param ordinal_date: The date as of the end of which to reconstruct the state.
+        @param kinds: Optionally, the kinds of facts to reconstruct; by default, all of them.
+        """
+        self._check_date(ordinal_date)
+        kinds = kinds or self.DEFAULT_VALUES.keys()
+        facts = {kind: {} for kind in kinds}
+        # Load the nearest snapshot taken no later than that day (if there is one), which means
+        # starting from the keyframe preceding it and applying the deltas in between
+        snapshot_index = bisect_right(self.snapshot_dates, ordinal_date) - 1
+        log_position = self.n_changes_discarded
+        if snapshot_index >= 0:
+            keyframe_index = snapshot_index
+            while not self.snapshots[keyframe_index].keyframe:
+                keyframe_index -= 1
+            for snapshot in self.snapshots[keyframe_index:snapshot_index+1]:
+                for kind in kinds:
+                    facts[kind].update(snapshot.facts[kind])
+            log_position = self.snapshots[snapshot_index].log_position
+        # Replay the changes logged since, through the end of that day
+        start = log_position - self.n_changes_discarded
+        end = bisect_right(self.change_dates, ordinal_date)
+        for kind, key, value in self.changes[start:end]:
+            if kind in facts:
+                facts[kind][key] = value
+        # Drop the facts that have reverted to their default values
+        for kind in kinds:
+            default_value = self.DEFAULT_VALUES[kind]
+            facts[kind] = {key: value for key, value in facts[kind].iteritems() if value != default_value}
+        return facts
+
+    def state_at(self, ordinal_date):
+        """Return a TownState object reconstructing who lived where and owned what as of the end of the given day."""
+        facts = self.facts_at(ordinal_date)
+        occupants = {}
+        for place_id, person_id in facts[self.OCCUPANCY]:
+            occupants.setdefault(place_id, set()).add(person_id)
+        return TownState(
+            sim=self.sim, ordinal_date=ordinal_date, resident_ids=set(facts[self.RESIDENCY]),
+            occupant_ids=occupants, owner_ids=facts[self.OWNERSHIP]
+        )
+
+    def residents_at(self, ordinal_date):
+        """Return the set of people who lived in the town as of the end of the given day."""
+        resident_ids = self.facts_at(ordinal_date, kinds=(self.RESIDENCY,))[self.RESIDENCY]
+        return {self.sim.registry.person(person_id) for person_id in resident_ids}
+
+    def _latest_entry(self, kind, entity_id, ordinal_date):
+        """Return the index just past the last entry, as of the end of the given day, in the timeline
+        of the given entity, along with the timeline itself."""
+        self._check_date(ordinal_date)
+        timeline = self.timelines[kind].get(entity_id, [])
+        return bisect_left(timeline, (ordinal_date+1,)), timeline
+
+    def was_resident(self, person, ordinal_date):
+        """Return whether this person lived in the town as of the end of the given day."""
+        end, timeline = self._latest_entry(self.RESIDENCY, person.id, ordinal_date)
+        return timeline[end-1][1] if end else False
+
+    def owner_of(self, company, ordinal_date):
+        """Return the person who owned this company as of the end of the given day (None if nobody did)."""
+        end, timeline = self._latest_entry(self.OWNERSHIP, company.id, ordinal_date)
+        owner_id = timeline[end-1][1] if end else None
+        return self.sim.registry.person(owner_id) if owner_id is not None else None
+
+    def occupants_of(self, place, ordinal_date):
+        """Return the set of people who lived in this dwelling place as of the end of the given day."""
+        end, timeline = self._latest_entry(self.OCCUPANCY, place.id, ordinal_date)
+        occupant_ids = set()
+        for _, person_id, moved_in in timeline[:end]:
+            if moved_in:
+                occupant_ids.add(person_id)
+            else:
+                occupant_ids.discard(person_id)
+        return {self.sim.registry.person(person_id) for person_id in occupant_ids}
+
+
+class HistorySnapshot(object):
+    """A snapshot of the facts recorded by a TownHistory, as of the end of some day."""
+
+    def __init__(self, ordinal_date, keyframe, facts, log_position):
+        """Initialize a HistorySnapshot object.
+
+        @param ordinal_date: The date of this snapshot.
+        @param keyframe: Whether this snapshot holds the full state, rather than only the changes
+                         since the snapshot before it.
+        @param facts: A dictionary mapping each kind of fact to a dictionary mapping keys to values.
+        @param log_position: The (absolute) position in the change log as of this snapshot.
+        """
+        self.ordinal_date = ordinal_date
+        self.keyframe = keyframe
+        self.facts = facts
+        self.log_position = log_position
+
+
+class TownState(object):
+    """A reconstruction of who lived in the town, who lived where, and who owned what, as of some past day."""
+
+    def __init__(self, sim, ordinal_date, resident_ids, occupant_ids, owner_ids):
+        """Initialize a TownState object.
+
+        @param sim: The simulation that this state was reconstructed from.
+        @param ordinal_date: The date as of the end of which this is the state.
+        @param resident_ids: A set of the IDs of the town's residents.
+        @param occupant_ids: A dictionary mapping the IDs of dwelling places to sets of the IDs of their residents.
+        @param owner_ids: A dictionary mapping the IDs of companies to the IDs of their owners.
+        """
+        self.sim = sim
+        self.ordinal_date = ordinal_date
+        self.resident_ids = resident_ids
+        self.occupant_ids = occupant_ids
+        self.owner_ids = owner_ids
+
+    def __str__(self):
+        """Return string representation."""
+        return "The state of {town} as of {date}: {n} residents".format(
+            town=self.sim.town.name, date=self.sim.get_date(ordinal_date=self.ordinal_date), n=len(self.resident_ids)
+        )
+
+    @property
+    def residents(self):
+        """Return the set of people who lived in the town."""
+        return {self.sim.registry.person(person_id) for person_id in self.resident_ids}
+
+    def occupants_of(self, place):
+        """Return the set of people who lived in this dwelling place."""
+        return {self.sim.registry.person(person_id) for person_id in self.occupant_ids.get(place.id, ())}
+
+    def owner_of(self, company):
+        """Return the person who owned this company (None if nobody did)."""
+        owner_id = self.owner_ids.get(company.id)
+        return self.sim.registry.person(owner_id) if owner_id is not None else None
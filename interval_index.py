@@ -0,0 +1,124 @@
+import sys
+from array import array
+from bisect import bisect_right
+
+
+class IntervalIndex(object):
+    """An index of the spans of time over which things held (e.g., people living in a home, or
+    occupations at a business), supporting point-in-time and range queries.
+
+    Each interval is a half-open span of ordinal dates [start, end): the thing held as of the end
+    of every day from its start date up to, but not including, its end date, so that someone who
+    moves in and out on the same day never counts as having lived there. Intervals are opened as
+    things happen, which means they arrive in order of their start dates; they are stored in
+    arrays in that order, alongside a segment tree holding the latest end date within each range
+    of positions. A query finds (by binary search) the prefix of intervals that started early
+    enough and then descends only into the subtrees of that prefix whose latest end date is late
+    enough, so that it takes time proportional to log n plus the number of matches, rather than
+    requiring a walk over every interval.
+    """
+
+    OPEN = sys.maxint  # The end date of an interval that has not yet been closed
+
+    def __init__(self):
+        """Initialize an IntervalIndex object."""
+        self.items = []
+        self.starts = array('l')
+        self.ends = array('l')
+        self.open_intervals = {}  # Maps items to the positions of their open intervals
+        # The segment tree, stored as an implicit binary heap whose root is at position 1 and whose
+        # leaves, starting at position self.capacity, correspond to the intervals
+        self.capacity = 1
+        self.latest_ends = array('l', [-1, -1])
+
+    def __str__(self):
+        """Return string representation."""
+        return "An interval index of {n} intervals ({n_open} open)".format(
+            n=len(self.items), n_open=len(self.open_intervals)
+        )
+
+    def __len__(self):
+        """Return the number of intervals in this index."""
+        return len(self.items)
+
+    def open(self, item, ordinal_date):
+        """Open an interval for this item, starting on the given date."""
+        if item in self.open_intervals:
+            raise Exception("{} already has an open interval in this index".format(item))
+        if self.starts and ordinal_date < self.starts[-1]:
+            raise Exception("Intervals must be opened in chronological order")
+        position = len(self.items)
+        self.items.append(item)
+        self.starts.append(ordinal_date)
+        self.ends.append(self.OPEN)
+        self.open_intervals[item] = position
+        if position == self.capacity:
+            self._grow()
+        else:
+            self._update(position=position)
+
+    def close(self, item, ordinal_date):
+        """Close this item's open interval, ending on the given date."""
+        position = self.open_intervals.pop(item, None)
+        if position is None:
+            raise Exception("{} has no open interval in this index".format(item))
+        self.ends[position] = ordinal_date
+        self._update(position=position)
+
+    def _grow(self):
+        """Double the capacity of the segment tree and rebuild it."""
+        while self.capacity < len(self.items):
+            self.capacity *= 2
+        capacity = self.capacity
+        self.latest_ends = array('l', [-1]) * (2 * capacity)
+        for position in xrange(len(self.items)):
+            self.latest_ends[capacity+position] = self._effective_end(position=position)
+        for node in xrange(capacity-1, 0, -1):
+            self.latest_ends[node] = max(self.latest_ends[2*node], self.latest_ends[2*node+1])
+
+    def _effective_end(self, position):
+        """Return the end date of the interval at this position as far as the segment tree is concerned,
+        which is -1 for an empty interval (one that was opened and closed on the same day), so
+        that no query will ever match it."""
+        end = self.ends[position]
+        return end if end > self.starts[position] else -1
+
+    def _update(self, position):
+        """Update the segment tree to reflect the current end date of the interval at this position."""
+        latest_ends = self.latest_ends
+        node = self.capacity + position
+        latest_ends[node] = self._effective_end(position=position)
+        node //= 2
+        while node:
+            latest_ends[node] = max(latest_ends[2*node], latest_ends[2*node+1])
+            node //= 2
+
+    def _search(self, latest_start, earliest_end):
+        """Return, in order of their start dates, the items whose intervals started no later than
+        latest_start and end after earliest_end."""
+        n_candidates = bisect_right(self.starts, latest_start)
+        latest_ends, capacity = self.latest_ends, self.capacity
+        matches = []
+        # Each node on the stack is given along with the position of the first interval it spans
+        # and the number of intervals it spans; right children are pushed first, so that matches
+        # are found in order
+        stack = [(1, 0, capacity)] if n_candidates else []
+        while stack:
+            node, first_position, span = stack.pop()
+            if first_position >= n_candidates or latest_ends[node] <= earliest_end:
+                continue
+            if node >= capacity:
+                matches.append(self.items[first_position])
+            else:
+                half = span // 2
+                stack.append((2*node+1, first_position+half, half))
+                stack.append((2*node, first_position, half))
+        return matches
+
+    def at(self, ordinal_date):
+        """Return the items whose intervals held as of the end of the given day."""
+        return self._search(latest_start=ordinal_date, earliest_end=ordinal_date)
+
+    def during(self, start_date, end_date):
+        """Return the items whose intervals held as of the end of any day from start_date through end_date."""
+        return self._search(latest_start=end_date, earliest_end=start_date)
@@ -0,0 +1,268 @@
+from collections import deque
+
+
+class JobMarket(object):
+    """An index of the supplemental job vacancies currently open at companies in a town.
+
+    Companies list their supplemental vacancies (see config.py) in order of priority; rather
+    than having every job seeker scan every company's listings on every timestep, this
+    object indexes those listings by occupation and shift, with each listing's priority
+    (the index of the first instance of that occupation in the company's listing for that
+    shift) precomputed. The index must be updated by calling update() whenever a company's
+    .supplemental_vacancies attribute changes.
+    """
+
+    def __init__(self, town):
+        """Initialize a JobMarket object.
+
+        @param town: The town whose job market this is.
+        """
+        self.town = town
+        # Maps occupation class to a dictionary mapping (company, shift) tuples to the
+        # priority of that vacancy in that company's listings for that shift
+        self.vacancies = {}
+        # Maps (company, shift) tuples to the set of occupation classes that company
+        # currently lists for that shift; this lets us retract a company's old listings
+        self.listings = {}
+
+    def update(self, company, shift):
+        """Re-index a company's supplemental vacancies for the given shift."""
+        self._retract(company=company, shift=shift)
+        listed_positions = set()
+        for priority, position in enumerate(company.supplemental_vacancies[shift]):
+            if position not in listed_positions:
+                listed_positions.add(position)
+                if position not in self.vacancies:
+                    self.vacancies[position] = {}
+                self.vacancies[position][(company, shift)] = priority
+        if listed_positions:
+            self.listings[(company, shift)] = listed_positions
+
+    def remove_company(self, company):
+        """Retract all of a company's listings, e.g., because it has gone out of business."""
+        for shift in ('day', 'night'):
+            self._retract(company=company, shift=shift)
+
+    def _retract(self, company, shift):
+        """Retract a company's listings for the given shift."""
+        for position in self.listings.pop((company, shift), ()):
+            del self.vacancies[position][(company, shift)]
+            if not self.vacancies[position]:
+                del self.vacancies[position]
+
+    def open_positions_for(self, person):
+        """Return a dictionary mapping (company, position, shift) tuples to priorities for
+        all vacancies for which this person is qualified.
+
+        Qualification for a position does not depend on the company offering it, so we only
+        have to check whether the person qualifies once per occupation, and we can rule out
+        occupations requiring a college degree without checking at all.
+        """
+        config = self.town.sim.config
+        open_positions = {}
+        for position in self.vacancies:
+            if position in config.occupations_requiring_college_degree and not person.college_graduate:
+                continue
+            listings_for_this_position = self.vacancies[position]
+            any_company = next(iter(listings_for_this_position))[0]
+            person_is_qualified = any_company.check_if_person_is_qualified_for_the_position(
+                candidate=person, occupation_of_need=position
+            )
+            if person_is_qualified:
+                for company, shift in listings_for_this_position:
+                    open_positions[(company, position, shift)] = listings_for_this_position[(company, shift)]
+        return open_positions
+
+
+class LaborPool(object):
+    """An index of the people in a town who could be considered as candidates for a job.
+
+    A company looking to fill a position considers everyone currently working at a company
+    in town, along with all the unemployed people in town who are in the workforce and are
+    not retired; this object buckets those people by the attributes that most commonly rule
+    them out of consideration -- their current job level, whether they are a college graduate,
+    and whether they have been at their current job for at least a year -- so that companies
+    only have to run the full qualification check on people who could actually pass it. The
+    index must be updated by calling update() whenever any of those attributes may change
+    for a person (hirings, terminations, retirements, birthdays, departures, and so forth).
+    """
+
+    def __init__(self, town):
+        """Initialize a LaborPool object.
+
+        @param town: The town whose labor pool this is.
+        """
+        self.town = town
+        # Maps (job level, college graduate, seasoned) tuples to the set of people in
+        # that bucket, where job level is None for people without a current occupation
+        # and 'seasoned' is whether they have been at their current job for a year
+        self.buckets = {}
+        self.bucket_of = {}  # Maps people to the key of the bucket that they are in
+        # The year for which the unseasoned buckets are accurate; people hired in an
+        # earlier year get reindexed lazily by _season()
+        self.year = town.sim.year
+
+    def update(self, person):
+        """Reindex this person, adding them to or removing them from the pool as appropriate."""
+        self.remove(person)
+        if person.occupations and not person.occupations[-1].terminus:
+            in_the_labor_pool = True  # Currently holds a position at a company in town
+        else:
+            in_the_labor_pool = (
+                not person.occupation and not person.retired and person.in_the_workforce and
+                person in self.town.residents
+            )
+        if in_the_labor_pool:
+            if person.occupation:
+                key = (
+                    person.occupation.level, person.college_graduate, person.occupation.years_experience >= 1
+                )
+            else:
+                key = (None, person.college_graduate, True)
+            if key not in self.buckets:
+                self.buckets[key] = set()
+            self.buckets[key].add(person)
+            self.bucket_of[person] = key
+
+    def remove(self, person):
+        """Remove this person from the pool, if they are in it."""
+        key = self.bucket_of.pop(person, None)
+        if key:
+            self.buckets[key].remove(person)
+
+    def _season(self):
+        """Reindex everyone who was hired in a year that has since ended."""
+        if self.year != self.town.sim.year:
+            self.year = self.town.sim.year
+            for key in [k for k in self.buckets if not k[2]]:
+                for person in list(self.buckets[key]):
+                    self.update(person)
+
+    def candidates_for(self, company, occupation_of_need):
+        """Return everyone in the pool who is qualified for the given position at this company."""
+        config = self.town.sim.config
+        self._season()
+        level_of_this_position = config.job_levels[occupation_of_need]
+        college_degree_required = occupation_of_need in config.occupations_requiring_college_degree
+        candidates = set()
+        for key in self.buckets:
+            job_level, college_graduate, seasoned = key
+            if job_level is not None and (job_level >= level_of_this_position or not seasoned):
+                continue
+            if college_degree_required and not college_graduate:
+                continue
+            for person in self.buckets[key]:
+                if company.check_if_person_is_qualified_for_the_position(
+                        candidate=person, occupation_of_need=occupation_of_need
+                ):
+                    candidates.add(person)
+        return candidates
+
+
+class TradeRegistry(object):
+    """A registry of the residents of a town who currently practice each occupation.
+
+    This lets people looking to contract someone of a certain occupation (e.g., an architect
+    or a mortician) consider the practitioners of that trade without scanning the whole town
+    population. The registry must be updated by calling update() whenever a person's
+    occupation changes or they move into or out of the town.
+    """
+
+    def __init__(self, town):
+        """Initialize a TradeRegistry object.
+
+        @param town: The town whose trades this object registers.
+        """
+        self.town = town
+        self.workers = {}  # Maps occupation classes to the set of residents practicing them
+        self.trade_of = {}  # Maps people to the occupation class they are registered under
+
+    def update(self, person):
+        """Re-register this person under the occupation they currently practice, if any."""
+        trade = self.trade_of.pop(person, None)
+        if trade:
+            self.workers[trade].remove(person)
+        if person.occupation and person in self.town.residents:
+            trade = person.occupation.__class__
+            if trade not in self.workers:
+                self.workers[trade] = set()
+            self.workers[trade].add(person)
+            self.trade_of[person] = trade
+
+    def workers_of_trade(self, occupation):
+        """Return the set of residents who practice the given occupation."""
+        return self.workers.get(occupation, set())
+
+
+class HiringChain(object):
+    """A resolver for the chains of hirings that are set off when a vital position goes vacant.
+
+    When someone's occupation terminates, their company must immediately fill that position
+    (unless it is supplemental); but whoever gets hired to fill it will have their own former
+    position go vacant, which must in turn be filled, and so forth, in a domino effect that
+    can run through the whole town economy. Rather than having Occupation.terminate() and
+    Business.hire() call one another recursively, vacancies are put on a work queue that is
+    drained by whichever call set off the chain.
+    """
+
+    def __init__(self, town):
+        """Initialize a HiringChain object.
+
+        @param town: The town whose hiring chains this object resolves.
+        """
+        self.town = town
+        self.vacancies = deque()  # Occupation objects whose positions must be refilled
+        self.resolving = False
+        # Statistics: maps chain lengths (the number of hirings it took to resolve a chain)
+        # to the number of chains of that length that have been resolved
+        self.chain_lengths = {}
+
+    def refill(self, vacated_position):
+        """Have the company at which the given position was vacated refill it.
+
+        If a chain is already being resolved, the vacancy will get filled once the hiring
+        that caused it has finished; otherwise, this resolves the chain that it sets off.
+        """
+        self.vacancies.append(vacated_position)
+        if not self.resolving:
+            self._resolve()
+
+    def _resolve(self):
+        """Fill vacancies until there are no more."""
+        self.resolving = True
+        people_hired = set()
+        try:
+            while self.vacancies:
+                vacated_position = self.vacancies.popleft()
+                # A vacancy left over from a chain that was cut short by an exception may since
+                # have been filled, or its company may since have gone out of business
+                if vacated_position.company.out_of_business or vacated_position.succeeded_by:
+                    continue
+                vacated_position.company.hire(
+                    occupation_of_need=vacated_position.__class__, shift=vacated_position.shift,
+                    to_replace=vacated_position
+                )
+                new_hire = vacated_position.succeeded_by.person
+                # Since people may only be hired from lower-level positions, or positions that
+                # they've had for at least a year, no one should be hired twice in one chain
+                if new_hire in people_hired:
+                    raise Exception("{} was hired twice in the same hiring chain".format(new_hire.name))
+                people_hired.add(new_hire)
+        finally:
+            # If a hiring raised, the vacancies still queued are left for the next chain to fill (or skip)
+            self.resolving = False
+        chain_length = len(people_hired)
+        self.chain_lengths[chain_length] = self.chain_lengths.get(chain_length, 0) + 1
+
+    @property
+    def longest_chain(self):
+        """Return the length of the longest hiring chain that has been resolved."""
+        return max(self.chain_lengths) if self.chain_lengths else 0
+
+    def report(self):
+        """Print statistics about the hiring chains that have been resolved."""
+        n_chains = sum(self.chain_lengths.values())
+        n_hirings = sum(length * self.chain_lengths[length] for length in self.chain_lengths)
+        print "\tResolved {n} hiring chains comprising {m} hirings (longest: {l})".format(
+            n=n_chains, m=n_hirings, l=self.longest_chain
+        )
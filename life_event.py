@@ -154,6 +154,7 @@ class Birth(Event):
             baby.named_for = (first_name_namegiver, middle_name_namegiver)
         baby.last_name = self._decide_last_name()
         baby.maiden_name = baby.last_name
+        baby.sim.name_index.index_person(baby)
 
     def _decide_last_name(self):
         """Return what will be the baby's last name."""
@@ -341,6 +342,10 @@ class BusinessClosure(Event):
             LayOff(subject=employee.person, company=business, occupation=employee)
         self.town.companies.remove(business)
         self.town.former_companies.add(business)
+        self.town.sim.story_recognizer.observe_company(company=business)
+        self.town.sim.history.observe_ownership(company=business)
+        self.town.job_market.remove_company(company=business)
+        self.town.remove_service_provider(company=business)
         # Demolish the building -- TODO reify buildings separately from companies
         if self.town.businesses_of_type('ConstructionFirm'):
             demolition_company = random.choice(self.town.businesses_of_type('ConstructionFirm'))
@@ -372,6 +377,8 @@ class Death(Event):
         self.next_of_kin = subject.next_of_kin
         subject.town.residents.remove(subject)
         subject.town.deceased.add(subject)
+        subject.town.reindex_worker(person=subject)
+        subject.sim.history.observe_residency(person=subject)
         self._update_attributes_of_deceased_and_spouse()  # Must come before self.subject.go_to()
         self._vacate_job_position_of_the_deceased()
         if mortician:
@@ -392,10 +399,13 @@ class Death(Event):
         # Update attributes of this person's home
         subject.home.residents.remove(subject)
         subject.home.former_residents.add(subject)
+        subject.home.residency_index.close(item=subject, ordinal_date=subject.sim.ordinal_date)
+        subject.sim.history.observe_occupancy(place=subject.home, person=subject)
         if subject in subject.home.owners:
             subject.home.owners.remove(subject)
             if subject.home.residents and not subject.home.owners:
                 self._transfer_ownership_of_home_owned_by_the_deceased()
+            subject.home.update_owner_attributes()
         subject.go_to(destination=self.town.cemetery)
         subject.gravestone = Gravestone(subject=subject)
 
@@ -408,6 +418,7 @@ class Death(Event):
     def _update_attributes_of_deceased_and_spouse(self):
         config = self.subject.sim.config
         self.subject.alive = False
+        self.subject.routine.reset_visitable_pools_involving_this_person()
         if self.subject.marriage:
             self.widow = widow = self.subject.spouse
             widow.marriage.terminus = self
@@ -419,6 +430,8 @@ class Death(Event):
             widow.chance_of_remarrying = config.function_to_derive_chance_spouse_changes_name_back(
                 years_married=self.subject.marriage.duration
             )
+            self.subject.sim.story_recognizer.observe_person(person=widow)
+        self.subject.sim.story_recognizer.observe_person(person=self.subject)
 
     def _vacate_job_position_of_the_deceased(self):
         """Vacate the deceased's job position, if any."""
@@ -494,11 +507,17 @@ class Departure(Event):
         self.subject = subject
         subject.town.residents.remove(subject)
         subject.town.departed.add(subject)
+        subject.town.reindex_worker(person=subject)
+        subject.sim.history.observe_residency(person=subject)
         subject.departure = self
+        subject.routine.reset_visitable_pools_involving_this_person()
+        subject.sim.story_recognizer.observe_person(person=subject)
         self._vacate_job_position_of_the_departed()
         self.subject.go_to(destination=None)
         self.subject.home.residents.remove(self.subject)
         self.subject.home.former_residents.add(self.subject)
+        self.subject.home.residency_index.close(item=self.subject, ordinal_date=self.subject.sim.ordinal_date)
+        self.subject.sim.history.observe_occupancy(place=self.subject.home, person=self.subject)
         # Update .neighbor attributes for subject and for their now former neighbors
         self._update_neighbor_attributes()
 
@@ -593,7 +612,11 @@ class Divorce(Event):
             spouse2.greatgrandparents | spouse2.immediate_family | spouse2.uncles | spouse2.aunts |
             spouse2.cousins | spouse2.nieces | spouse2.nephews
         )
+        spouse1.routine.reset_visitable_pools()
+        spouse2.routine.reset_visitable_pools()
         self._have_divorcees_fall_out_of_love(divorcees=self.subjects, config=config)
+        spouse1.sim.story_recognizer.observe_person(person=spouse1)
+        spouse1.sim.story_recognizer.observe_person(person=spouse2)
         # Update salience values
         salience_change = (
             spouse1.sim.config.salience_increment_from_relationship_change['significant other'] +
@@ -614,11 +637,13 @@ class Divorce(Event):
                 n_simulated_timesteps=spouse1.sim.n_simulated_timesteps,
                 raw_spark=spouse1.relationships[spouse2].raw_spark
             )
+            spouse1.relationships[spouse2].update_captivation()
             if spouse2 is spouse1.love_interest:
                 new_love_interest = max(spouse1.relationships, key=lambda r: spouse1.relationships[r].spark)
                 if spouse1.relationships[new_love_interest] > 0:
                     spouse1.love_interest = new_love_interest
                     spouse1.spark_of_love_interest = spouse1.relationships[new_love_interest].spark
+            spouse1.sim.story_recognizer.observe_relationship(owner=spouse1, subject=spouse2)
         if random.random() < config.chance_a_divorcee_falls_out_of_love:
             spouse2.relationships[spouse1].raw_spark = (
                 config.new_raw_spark_value_for_divorcee_who_has_fallen_out_of_love
@@ -627,11 +652,13 @@ class Divorce(Event):
                 n_simulated_timesteps=spouse2.sim.n_simulated_timesteps,
                 raw_spark=spouse2.relationships[spouse1].raw_spark
             )
+            spouse2.relationships[spouse1].update_captivation()
             if spouse1 is spouse2.love_interest:
                 new_love_interest = max(spouse2.relationships, key=lambda r: spouse2.relationships[r].spark)
                 if spouse2.relationships[new_love_interest] > 0:
                     spouse2.love_interest = new_love_interest
                     spouse2.spark_of_love_interest = spouse2.relationships[new_love_interest].spark
+            spouse2.sim.story_recognizer.observe_relationship(owner=spouse2, subject=spouse1)
 
     def _have_divorcees_split_up_money(self):
         """Have the divorcees split their money up (50/50)."""
@@ -740,6 +767,7 @@ class Hiring(Event):
         else:
             self.promotion = False
         self.occupation.hiring = self
+        company.town.reindex_worker(person=subject)
 
     def __str__(self):
         """Return string representation."""
@@ -779,6 +807,7 @@ class HomePurchase(Event):
         """Transfer ownership of this house to its new owners."""
         self.home.former_owners |= self.home.owners
         self.home.owners = set(self.subjects)
+        self.home.update_owner_attributes()
 
 
 class HouseConstruction(Event):
@@ -890,6 +919,10 @@ class Marriage(Event):
         spouse2.immediate_family.add(spouse1)
         spouse1.extended_family |= spouse2.extended_family  # TODO THIS IS NOT TOTALLY ACCURATE
         spouse2.extended_family |= spouse1.extended_family
+        spouse1.routine.reset_visitable_pools()
+        spouse2.routine.reset_visitable_pools()
+        spouse1.sim.story_recognizer.observe_person(person=spouse1)
+        spouse1.sim.story_recognizer.observe_person(person=spouse2)
         self._cease_grieving_of_former_spouses(newlyweds=self.subjects)
         # Update salience values
         salience_change = (
@@ -992,6 +1025,7 @@ class Marriage(Event):
             # Make sure both spouses are among the home's listed owners
             for spouse in self.subjects:
                 home_they_will_move_into.owners.add(spouse)
+            home_they_will_move_into.update_owner_attributes()
             # Move the whole family in
             for family_member in family_members_that_will_move:
                 family_member.move(new_home=home_they_will_move_into, reason=self)
@@ -1021,15 +1055,24 @@ class Move(Event):
             if person.home:
                 person.home.residents.remove(person)
                 person.home.former_residents.add(person)
+                person.home.residency_index.close(item=person, ordinal_date=person.sim.ordinal_date)
+                person.sim.history.observe_occupancy(place=person.home, person=person)
             # Move into new home
             person.home = new_home
             new_home.residents.add(person)
+            new_home.residency_index.open(item=person, ordinal_date=person.sim.ordinal_date)
+            person.sim.history.observe_occupancy(place=new_home, person=person)
             person.moves.append(self)
             # Add yourself to town residents, if you moved from outside the town
             person.town = person.sim.town
             person.sim.town.residents.add(person)
+            person.sim.town.reindex_worker(person=person)
+            person.sim.story_recognizer.observe_person(person=person)
+            person.sim.history.observe_residency(person=person)
             # Go to your new home
             person.go_to(destination=new_home, occasion='home')
+            # Anyone who may have been planning to visit this person must reconsider
+            person.routine.reset_visitable_pools_involving_this_person()
         # Update .neighbor attributes for subjects, as well as their new and now former neighbors
         self._update_mover_and_neighbor_attributes()
 
@@ -1111,6 +1154,7 @@ class NameChange(Event):
         self.lawyer = lawyer
         # Actually change the name
         subject.last_name = new_last_name
+        subject.sim.name_index.index_person(subject)
         self.new_name = subject.name
         self.reason = reason  # Likely will point to a Marriage or Divorce object
         if isinstance(reason, Marriage):
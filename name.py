@@ -37,27 +37,13 @@ class Name(str):
         is not a surname, it will return None.
         """
         name_to_check_for = str(self) if not self.derived_from else str(self.derived_from[0])
-        if name_to_check_for in Names.scandinavian_surnames:
-            return 'Scandinavian'
-        elif name_to_check_for in Names.irish_surnames:
-            return 'Irish'
-        elif name_to_check_for in Names.german_surnames:
-            return 'German'
-        elif name_to_check_for in Names.french_surnames:
-            return 'French'
-        elif name_to_check_for in Names.english_surnames:
-            return 'English'
-        else:
-            return None
+        return Names.ethnicity_of_surname.get(name_to_check_for)
 
     @property
     def bearers(self):
         """Return all people who have had this name."""
-        bearers = set()
-        for person in self.progenitor.sim.town.all_time_residents:
-            if (person.first_name is self or
-                    person.middle_name is self or
-                    person.last_name is self or
-                    person.maiden_name is self):
-                bearers.add(person)
-        return bearers
\ No newline at end of file
+        town = self.progenitor.sim.town
+        return {
+            person for person in self.progenitor.sim.name_index.bearers_of(self) if
+            person in town.residents or person in town.deceased or person in town.departed
+        }
\ No newline at end of file
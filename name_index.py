@@ -0,0 +1,95 @@
+from bisect import bisect_left
+
+
+class NameIndex(object):
+    """An index of the names of all the people and companies in a simulation.
+
+    Looking someone up by name (e.g., in Simulation.find()) or finding everyone who has borne
+    a Name object (Name.bearers) used to require scanning everyone who has ever lived in the
+    town; this object instead maps name strings to the people and companies going by them and
+    Name objects to the people bearing them. The index must be updated by calling
+    index_person() whenever a person's name is set or changed (births, people generated ex
+    nihilo, name changes) and index_company() whenever a company is named or renamed.
+    """
+
+    def __init__(self, sim):
+        """Initialize a NameIndex object.
+
+        @param sim: The simulation whose names this object indexes.
+        """
+        self.sim = sim
+        self.people_by_name = {}  # Maps name strings (as in Person.name) to sets of people
+        self.companies_by_name = {}  # Maps company names to sets of companies
+        # Maps the IDs of Name objects to the set of people bearing them; since Name is a
+        # subclass of str, two different Name objects with the same value would hash the
+        # same, so we have to key on identity
+        self.bearers_by_name_object = {}
+        # Maps people and companies to what they are currently indexed under, so that their
+        # old entries can be retracted when their names change
+        self.name_of = {}
+        self.name_objects_of = {}
+        # A sorted list of all the name strings in the index, for prefix search; this gets
+        # rebuilt lazily, since names are added far more often than they are searched
+        self._sorted_names = None
+
+    def index_person(self, person):
+        """Re-index this person under their current name."""
+        self._retract(entity=person, index=self.people_by_name)
+        for name_object_id in self.name_objects_of.pop(person, ()):
+            self.bearers_by_name_object[name_object_id].discard(person)
+            if not self.bearers_by_name_object[name_object_id]:
+                del self.bearers_by_name_object[name_object_id]
+        name = person.name
+        self._add(entity=person, name=name, index=self.people_by_name)
+        name_object_ids = {
+            id(n) for n in (person.first_name, person.middle_name, person.last_name, person.maiden_name) if n
+        }
+        for name_object_id in name_object_ids:
+            if name_object_id not in self.bearers_by_name_object:
+                self.bearers_by_name_object[name_object_id] = set()
+            self.bearers_by_name_object[name_object_id].add(person)
+        self.name_objects_of[person] = name_object_ids
+
+    def index_company(self, company):
+        """Re-index this company under its current name."""
+        self._retract(entity=company, index=self.companies_by_name)
+        if company.name:
+            self._add(entity=company, name=company.name, index=self.companies_by_name)
+
+    def _add(self, entity, name, index):
+        """Add the given person or company to the given index under the given name."""
+        if name not in index:
+            index[name] = set()
+            self._sorted_names = None
+        index[name].add(entity)
+        self.name_of[entity] = name
+
+    def _retract(self, entity, index):
+        """Remove the given person or company from the given index, if they are in it."""
+        name = self.name_of.pop(entity, None)
+        if name is not None:
+            index[name].discard(entity)
+
+    def people_named(self, name):
+        """Return the set of people (living, dead, or elsewhere) who currently go by this name."""
+        return self.people_by_name.get(name, set())
+
+    def companies_named(self, name):
+        """Return the set of companies (including former ones) that currently go by this name."""
+        return self.companies_by_name.get(name, set())
+
+    def bearers_of(self, name_object):
+        """Return the set of people who bear this Name object as a first, middle, last, or maiden name."""
+        return self.bearers_by_name_object.get(id(name_object), set())
+
+    def names_starting_with(self, prefix):
+        """Return a sorted list of all the indexed names of people and companies starting with this prefix."""
+        if self._sorted_names is None:
+            self._sorted_names = sorted(set(self.people_by_name) | set(self.companies_by_name))
+        names = []
+        for name in self._sorted_names[bisect_left(self._sorted_names, prefix):]:
+            if not name.startswith(prefix):
+                break
+            if self.people_by_name.get(name) or self.companies_by_name.get(name):
+                names.append(name)
+        return names
@@ -0,0 +1,137 @@
+import random
+from collections import deque
+
+
+def adjacency_lists(network, relationship_types=None, undirected=False):
+    """Return a dictionary mapping the ID of everyone in the network to a list of the IDs of the
+    people they have relationships with.
+
+    @param network: A SocialNetwork object.
+    @param relationship_types: Optionally, a collection of relationship types (e.g., ('friendship',))
+                               to restrict the relationships to.
+    @param undirected: Whether to also link people to everyone who has a relationship with them.
+    """
+    indptr, indices, relationship_type = network.indptr, network.indices, network.relationship_type
+    codes = network.type_codes(relationship_types) if relationship_types is not None else None
+    adjacency = {}
+    for person_id in network.person_ids:
+        start, end = indptr[person_id], indptr[person_id+1]
+        if codes is None:
+            adjacency[person_id] = list(indices[start:end])
+        else:
+            adjacency[person_id] = [indices[i] for i in xrange(start, end) if relationship_type[i] in codes]
+    if undirected:
+        adjacency = {person_id: set(neighbors) for person_id, neighbors in adjacency.iteritems()}
+        for person_id in network.person_ids:
+            for other_person_id in list(adjacency[person_id]):
+                adjacency[other_person_id].add(person_id)
+        adjacency = {person_id: sorted(neighbors) for person_id, neighbors in adjacency.iteritems()}
+    return adjacency
+
+
+def degree_distribution(network, relationship_types=None):
+    """Return a dictionary mapping each number of relationships that people in the network have
+    to the number of people who have that many."""
+    distribution = {}
+    if relationship_types is None:
+        indptr = network.indptr
+        degrees = (indptr[person_id+1] - indptr[person_id] for person_id in network.person_ids)
+    else:
+        adjacency = adjacency_lists(network, relationship_types=relationship_types)
+        degrees = (len(neighbors) for neighbors in adjacency.itervalues())
+    for degree in degrees:
+        distribution[degree] = distribution.get(degree, 0) + 1
+    return distribution
+
+
+def mutual_friend_counts(network):
+    """Return a dictionary mapping (person_id, friend_id) tuples, for every pair of people where the
+    first considers the second a friend, to the number of people whom both consider friends."""
+    friends_of = {
+        person_id: frozenset(friends) for person_id, friends in
+        adjacency_lists(network, relationship_types=('friendship',)).iteritems()
+    }
+    counts = {}
+    for person_id, friends in friends_of.iteritems():
+        for friend_id in friends:
+            counts[(person_id, friend_id)] = len(friends & friends_of[friend_id])
+    return counts
+
+
+def connected_components(network, relationship_types=None):
+    """Return a list of the connected components of the network (ignoring the direction of
+    relationships), each a sorted list of person IDs, from largest to smallest."""
+    # Union-find, with path halving
+    parent = {person_id: person_id for person_id in network.person_ids}
+
+    def find(person_id):
+        while parent[person_id] != person_id:
+            parent[person_id] = parent[parent[person_id]]
+            person_id = parent[person_id]
+        return person_id
+
+    for person_id, neighbors in adjacency_lists(network, relationship_types=relationship_types).iteritems():
+        for other_person_id in neighbors:
+            root, other_root = find(person_id), find(other_person_id)
+            if root != other_root:
+                parent[max(root, other_root)] = min(root, other_root)
+    components = {}
+    for person_id in network.person_ids:
+        components.setdefault(find(person_id), []).append(person_id)
+    return sorted(components.values(), key=lambda component: (-len(component), component[0]))
+
+
+def approximate_betweenness(network, samples=64, relationship_types=None, seed=0):
+    """Return a dictionary mapping the ID of everyone in the network to their approximate betweenness centrality.
+
+    This runs Brandes' algorithm from a random sample of source people, rather than from everyone,
+    and scales the result up accordingly; if samples is at least the number of people in the
+    network, the betweenness is exact. Relationships are treated as directed and unweighted.
+
+    @param network: A SocialNetwork object.
+    @param samples: The number of source people to sample.
+    @param relationship_types: Optionally, a collection of relationship types to restrict the relationships to.
+    @param seed: A seed for sampling the sources; this uses its own random-number generator, so
+                 that calling it during simulation does not affect the simulation's randomness.
+    """
+    adjacency = adjacency_lists(network, relationship_types=relationship_types)
+    person_ids = network.person_ids
+    if samples >= len(person_ids):
+        sources = person_ids
+    else:
+        sources = random.Random(seed).sample(person_ids, samples)
+    betweenness = dict.fromkeys(person_ids, 0.0)
+    for source in sources:
+        # Count the shortest paths from this source to everyone, by breadth-first search
+        order = []
+        predecessors = {source: []}
+        number_of_shortest_paths = {source: 1}
+        distance = {source: 0}
+        queue = deque([source])
+        while queue:
+            person_id = queue.popleft()
+            order.append(person_id)
+            next_distance = distance[person_id] + 1
+            paths_to_this_person = number_of_shortest_paths[person_id]
+            for other_person_id in adjacency[person_id]:
+                other_distance = distance.get(other_person_id)
+                if other_distance is None:
+                    other_distance = distance[other_person_id] = next_distance
+                    number_of_shortest_paths[other_person_id] = 0
+                    predecessors[other_person_id] = []
+                    queue.append(other_person_id)
+                if other_distance == next_distance:
+                    number_of_shortest_paths[other_person_id] += paths_to_this_person
+                    predecessors[other_person_id].append(person_id)
+        # Accumulate each person's dependency on the source, from the farthest people back
+        dependency = dict.fromkeys(order, 0.0)
+        for person_id in reversed(order):
+            for predecessor_id in predecessors[person_id]:
+                dependency[predecessor_id] += (
+                    float(number_of_shortest_paths[predecessor_id]) / number_of_shortest_paths[person_id] *
+                    (1.0 + dependency[person_id])
+                )
+            if person_id != source:
+                betweenness[person_id] += dependency[person_id]
+    scale = float(len(person_ids)) / len(sources) if sources else 0.0
+    return {person_id: centrality * scale for person_id, centrality in betweenness.iteritems()}
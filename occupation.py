@@ -16,6 +16,7 @@ class Occupation(object):
         self.company = company
         self.shift = shift
         self.company.employees.add(self)
+        self.company.employment_index.open(item=self, ordinal_date=person.sim.ordinal_date)
         self.start_date = person.sim.year
         self.hiring = None  # event.Hiring object holding data about the hiring; gets set by that object's __init__()
         self.end_date = None  # Changed by self.terminate
@@ -95,6 +96,8 @@ class Occupation(object):
         self.terminus = reason
         self.company.employees.remove(self)
         self.company.former_employees.add(self)
+        self.company.employment_index.close(item=self, ordinal_date=self.person.sim.ordinal_date)
+        self.company.town.reindex_worker(person=self.person)
         if self is self.company.owner:
             self.company.former_owners.append(self)
         # If this isn't an in-house promotion, update a bunch of attributes
@@ -121,7 +124,8 @@ class Occupation(object):
                     entity=employee.person, change=change_in_salience_for_former_coworker
                 )
         # This position is now vacant, so now have the company that this person worked
-        # for fill that now vacant position (which may cause a hiring chain) unless
+        # for fill that now vacant position (which may cause a hiring chain, which will
+        # be resolved by the town's HiringChain object -- see job_market.py) unless
         # this position is supplemental (i.e., not vital to this businesses' basic
         # operation), in which case we add it back into the business's listing of
         # supplemental positions that may be filled at some point that someone really
@@ -133,15 +137,15 @@ class Occupation(object):
         if not self.company.out_of_business:
             position_that_is_now_vacant = self.__class__
             if not self.supplemental:
-                self.company.hire(
-                    occupation_of_need=position_that_is_now_vacant, shift=self.shift, to_replace=self
-                )
+                self.company.town.hiring_chain.refill(vacated_position=self)
             elif not self.hired_as_favor:
                 self.company.supplemental_vacancies[self.shift].append(position_that_is_now_vacant)
+                self.company.town.job_market.update(company=self.company, shift=self.shift)
         # If the person hasn't already been hired to a new position, set their occupation
         # attribute to None
         if self.person.occupation is self:
             self.person.occupation = None
+            self.company.town.reindex_worker(person=self.person)
         # If this person is retiring, set their .coworkers to the empty set
         if reason.__class__.__name__ == "Retirement":
             self.person.coworkers = set()
@@ -22,12 +22,15 @@ class Person(object):
         self.sim = sim
         self.id = self.sim.current_person_id
         self.sim.current_person_id += 1
+        self.sim.registry.register(kind='person', entity=self)
         self.type = "person"
+        self.archived = False  # Whether this person has been archived (see PersonArchive)
         self.birth = birth
         if birth:
             self.town = self.birth.town
             if self.town:
                 self.town.residents.add(self)
+                self.sim.history.observe_residency(person=self)
             # Set parents
             self.biological_mother = birth.biological_mother
             self.mother = birth.mother
@@ -155,6 +158,10 @@ class Person(object):
         self.worst_enemy = None
         self.love_interest = None
         self.significant_other = None
+        # The people whose spark this person has crossed the threshold for being captivated by,
+        # and vice versa; these get maintained by Relationship.update_captivation()
+        self.captivations = set()
+        self.admirers = set()
         self.charge_of_best_friend = 0.0  # These get used to track changes to a person's major relationships
         self.charge_of_worst_enemy = 0.0
         self.spark_of_love_interest = 0.0
@@ -212,6 +219,17 @@ class Person(object):
         else:
             return "{}, {}-{}".format(self.name, self.birth_year, self.death_year)
 
+    def __getattr__(self, name):
+        """Rehydrate this person, if they have been archived, upon access to an attribute that was archived.
+
+        This only gets called when normal attribute lookup fails, so it costs nothing for people
+        who have not been archived.
+        """
+        if self.__dict__.get('archived'):
+            self.sim.archive.rehydrate(person=self)
+            return getattr(self, name)
+        raise AttributeError("'{}' object has no attribute '{}'".format(self.__class__.__name__, name))
+
     @staticmethod
     def _init_fertility(male, config):
         """Determine whether this person will be able to reproduce."""
@@ -328,6 +346,8 @@ class Person(object):
             )
         for member in self.extended_family:
             member.extended_family.add(self)
+            if member.present:  # Relatives who have died or departed won't visit anyone
+                member.routine.reset_visitable_pools()
             member.update_salience_of(
                 entity=self, change=config.salience_increment_from_relationship_change["extended family"]
             )
@@ -544,9 +564,7 @@ class Person(object):
         elif any(f for f in self.friends if f.adult and f.present):
             next_of_kin = next(f for f in self.friends if f.adult and f.present)
         else:
-            next_of_kin = random.choice(
-                [r for r in self.town.residents if r.adult and r.present]
-            )
+            next_of_kin = self.town.residents.random_choice(condition=lambda r: r.adult and r.present)
         return next_of_kin
 
     @property
@@ -700,8 +718,7 @@ class Person(object):
     @property
     def is_captivated_by(self):
         """The set of people that this person is romantically captivated by."""
-        spark_threshold_for_being_captivated = self.sim.config.spark_threshold_for_being_captivated
-        return [p for p in self.relationships if self.relationships[p].spark > spark_threshold_for_being_captivated]
+        return list(self.captivations)
 
     def recount_life_history(self):
         """Print out the major life events in this person's simulated life."""
@@ -1470,6 +1487,7 @@ class Person(object):
             if i_am_qualified_for_this_position:
                 if must_add_supplemental_position:
                     family_company.supplemental_vacancies[shift].append(position)
+                    family_company.town.job_market.update(company=family_company, shift=shift)
                 family_company.hire(
                     occupation_of_need=position, shift=shift, to_replace=None,
                     fills_supplemental_job_vacancy=True, selected_candidate=self,
@@ -1499,22 +1517,17 @@ class Person(object):
         """Get scored as a job candidate by all companies in town for all their supplemental positions."""
         scores = {}
         # Assemble scores of this person as a job candidate from all companies
-        # in town for all of their open positions, day- or night-shift
-        for company in self.town.companies:
-            for shift in ('day', 'night'):
-                for position in company.supplemental_vacancies[shift]:
-                    i_am_qualified_for_this_position = (
-                        company.check_if_person_is_qualified_for_the_position(
-                            candidate=self, occupation_of_need=position
-                        )
-                    )
-                    if i_am_qualified_for_this_position:
-                        score = company.rate_job_candidate(person=self)
-                        # The open positions are listed in order of priority, so
-                        # penalize this position if its not the company's top priority
-                        priority = company.supplemental_vacancies[shift].index(position)
-                        score /= priority+1
-                        scores[(company, position, shift)] = score
+        # in town for all of the open positions, day- or night-shift, that this
+        # person is qualified for (the town's job market indexes these for us)
+        open_positions = self.town.job_market.open_positions_for(person=self)
+        company_ratings = {}
+        for company, position, shift in open_positions:
+            if company not in company_ratings:
+                company_ratings[company] = company.rate_job_candidate(person=self)
+            # The open positions are listed in order of priority, so
+            # penalize this position if its not the company's top priority
+            priority = open_positions[(company, position, shift)]
+            scores[(company, position, shift)] = company_ratings[company] / (priority+1)
         return scores
 
     def move_out_of_parents(self):
@@ -1532,10 +1545,10 @@ class Person(object):
     def go_to(self, destination, occasion=None):
         """Go to destination and spend this timestep there."""
         if self.location:  # People just being instantiated won't have a location yet
-            self.location.people_here_now.remove(self)
+            self.location.register_departure(person=self)
         self.location = destination
         if destination and self.alive:  # 'destination' will be None for Departures, and dead people go_to cemetery
-            destination.people_here_now.add(self)
+            destination.register_arrival(person=self)
             # Update this person's whereabouts
             self.whereabouts.record(occasion=occasion)
 
@@ -1606,41 +1619,43 @@ class Person(object):
         return choice
 
     def _rate_all_potential_contractors_of_certain_occupation(self, pool):
-        """Score all potential hires of a certain occupation."""
-        scores = {}
-        for person in pool:
-            scores[person] = self._rate_potential_contractor_of_certain_occupation(person=person)
-        return scores
+        """Score all potential hires of a certain occupation, with preference to family, friends, former hires.
 
-    def _rate_potential_contractor_of_certain_occupation(self, person):
-        """Score a potential hire of a certain occupation, with preference to family, friends, former hires.
+        Rather than checking each potential hire against each of the social groups that
+        bear on this decision, we intersect each of those groups with the pool once.
 
         TODO: Have this be affected by personality (beyond what being a friend captures).
         """
-        score = 0
+        config = self.sim.config
+        pool = set(pool)
+        scores = dict.fromkeys(pool, 0)
         # Rate according to social reasons
         if self.spouse:
             people_involved_in_this_decision = (self, self.spouse)
         else:
             people_involved_in_this_decision = (self,)
         for decision_maker in people_involved_in_this_decision:
-            if person in decision_maker.immediate_family:
-                score += decision_maker.sim.config.preference_to_contract_immediate_family
-            elif person in decision_maker.extended_family:  # elif because immediate family is subset of extended family
-                score += decision_maker.sim.config.preference_to_contract_extended_family
-            if person in decision_maker.friends:
-                score += decision_maker.sim.config.preference_to_contract_friend
-            elif person in decision_maker.acquaintances:
-                score += decision_maker.sim.config.preference_to_contract_acquaintance
-            if person in decision_maker.enemies:
-                score += decision_maker.sim.config.dispreference_to_hire_enemy
-            if person in decision_maker.former_contractors:
-                score += decision_maker.sim.config.preference_to_contract_former_contract
-        # Multiply score according to this person's experience in this occupation
-        score *= person.sim.config.function_to_derive_score_multiplier_bonus_for_experience(
-            years_experience=person.occupation.years_experience
-        )
-        return score
+            immediate_family_in_pool = pool & decision_maker.immediate_family
+            friends_in_pool = pool & decision_maker.friends
+            social_score_components = (
+                (immediate_family_in_pool, config.preference_to_contract_immediate_family),
+                # Immediate family is a subset of extended family, so don't count them twice
+                (pool & decision_maker.extended_family - immediate_family_in_pool,
+                 config.preference_to_contract_extended_family),
+                (friends_in_pool, config.preference_to_contract_friend),
+                (pool & decision_maker.acquaintances - friends_in_pool, config.preference_to_contract_acquaintance),
+                (pool & decision_maker.enemies, config.dispreference_to_hire_enemy),
+                (pool & decision_maker.former_contractors, config.preference_to_contract_former_contract),
+            )
+            for people, score_component in social_score_components:
+                for person in people:
+                    scores[person] += score_component
+        # Multiply scores according to each person's experience in this occupation
+        for person in pool:
+            scores[person] *= config.function_to_derive_score_multiplier_bonus_for_experience(
+                years_experience=person.occupation.years_experience
+            )
+        return scores
 
     def purchase_home(self, purchasers, home):
         # TEMP THING DUE TO CIRCULAR DEPENDENCY -- SEE RESIDENCE.PY -- TODO
@@ -1887,6 +1902,8 @@ class Person(object):
         if age == config.age_people_start_working(year=self.sim.year):
             self.in_the_workforce = True
             consider_leaving_town = True
+            if self.town:
+                self.town.reindex_worker(person=self)
         if age == 18:
             self.adult = True
         # If you're now old enough to be developing romantic feelings for other characters,
@@ -2016,6 +2033,7 @@ class PersonExNihilo(Person):
         )
         self.maiden_name = self.last_name
         self.named_for = None
+        sim.name_index.index_person(self)
         # If this person is being hired for a high job level, retcon that they have
         # a college education -- do the same for the town founder
         if (job_opportunity_impetus and
@@ -2171,9 +2189,12 @@ class PersonExNihilo(Person):
         """Move into the town in which simplay takes place."""
         self.town = self.sim.town
         self.town.residents.add(self)
+        self.town.reindex_worker(person=self)
+        self.sim.story_recognizer.observe_person(person=self)
+        self.sim.history.observe_residency(person=self)
         new_home = self.secure_home()
         if not new_home:
-            someone_elses_home = random.choice(list(self.town.dwelling_places))
+            someone_elses_home = self.town.dwelling_places.random_choice()
             self.move(new_home=someone_elses_home, reason=hiring_that_instigated_move)
         if new_home:
             self.move(new_home=new_home, reason=hiring_that_instigated_move)
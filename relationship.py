@@ -67,6 +67,7 @@ class Relationship(object):
         self.interacted_this_timestep = False
         # Keep track of all the conversations they've had during hi-fi timesteps
         self.conversations = []
+        self.update_captivation()
 
     def _init_get_compatibility(self):
         """Determine the objective compatibility of these two people.
@@ -209,6 +210,19 @@ class Relationship(object):
         """
         self.raw_spark_increment = self._init_determine_initial_spark_increment()
 
+    def update_captivation(self):
+        """Update whether the owner is captivated by the subject, given the current spark of this relationship.
+
+        This must be called whenever the spark of a relationship changes, so that the owner's
+        .captivations attribute and the subject's .admirers attribute stay up to date.
+        """
+        if self.spark > self.owner.sim.config.spark_threshold_for_being_captivated:
+            self.owner.captivations.add(self.subject)
+            self.subject.admirers.add(self.owner)
+        else:
+            self.owner.captivations.discard(self.subject)
+            self.subject.admirers.discard(self.owner)
+
     def update_spark_and_charge_increments_for_new_age_difference(self):
         """Set a new charge increment for this relationship that reflects a new age difference.
 
@@ -294,6 +308,8 @@ class Relationship(object):
             Friendship(owner=owner, subject=subject, preceded_by=self)
         elif self.type != "enmity" and self.charge < config.charge_threshold_enmity:
             Enmity(owner=owner, subject=subject, preceded_by=self)
+        elif self.type == "friendship":
+            owner.routine.update_best_visitable_friend(friend=subject, charge=self.charge)
         # Progress spark, possibly leading to a
         self.raw_spark_increment *= config.spark_decay_rate
         change_to_spark = (
@@ -306,9 +322,14 @@ class Relationship(object):
         self.spark = self.owner.sim.config.function_to_normalize_raw_spark(
             n_simulated_timesteps=self.owner.sim.n_simulated_timesteps, raw_spark=self.raw_spark
         )
+        if not self.succeeded_by:
+            # (If this was just succeeded by a Friendship or Enmity, that relationship is now
+            # the one that determines whether owner is captivated by subject)
+            self.update_captivation()
         # Check if subject is now owner's new best friend, worst enemy, or love interest; if
         # so, update accordingly
         self._update_social_network()
+        owner.sim.story_recognizer.observe_relationship(owner=owner, subject=subject)
         self.interacted_this_timestep = True
         # Call this method for the subject's own conception of this relationship
         # to update its attributes according to this interaction
@@ -408,6 +429,7 @@ class Acquaintance(Relationship):
         owner.update_salience_of(
             subject, change=owner.sim.config.salience_increment_from_relationship_change['acquaintance']
         )
+        owner.sim.story_recognizer.observe_relationship(owner=owner, subject=subject)
 
 
 class Enmity(Relationship):
@@ -428,6 +450,7 @@ class Enmity(Relationship):
         owner.update_salience_of(
             subject, change=owner.sim.config.salience_increment_from_relationship_change['enemy']
         )
+        owner.sim.story_recognizer.observe_relationship(owner=owner, subject=subject)
 
 
 class Friendship(Relationship):
@@ -443,8 +466,10 @@ class Friendship(Relationship):
         super(Friendship, self).__init__(owner, subject, preceded_by)
         owner.acquaintances.remove(subject)
         owner.friends.add(subject)
+        owner.routine.reset_visitable_pools()
         # Update the salience value owner has for subject (not vice versa, because relationships
         # are unidirectional)
         owner.update_salience_of(
             subject, change=owner.sim.config.salience_increment_from_relationship_change['friend']
         )
+        owner.sim.story_recognizer.observe_relationship(owner=owner, subject=subject)
@@ -1,4 +1,5 @@
 import random
+from interval_index import IntervalIndex
 
 
 class DwellingPlace(object):
@@ -11,6 +12,7 @@ class DwellingPlace(object):
         """
         self.id = owners[0].sim.current_place_id
         owners[0].sim.current_place_id += 1
+        owners[0].sim.registry.register(kind='place', entity=self)
         self.type = "residence"
         self.town = lot.town
         self.town.dwelling_places.add(self)
@@ -28,8 +30,13 @@ class DwellingPlace(object):
         self.transactions = []
         self.move_ins = []
         self.move_outs = []
+        # An index of the spans of time over which people have lived here, for point-in-time queries
+        self.residency_index = IntervalIndex()
         self.owners = set()  # Gets set via self._init_ownership()
         self.former_owners = set()
+        # These get set by self.update_owner_attributes(), which is called whenever ownership changes
+        self.owners_list = []  # Listing of self.owners, used to decide who was the last to leave
+        self.most_neurotic_owner = None
         self._init_ownership(initial_owners=owners)
         self.people_here_now = set()  # People at home on a specific time step (either a resident or visitor)
         self.demolition = None  # Potentially gets set by event.Demolition.__init__()
@@ -59,15 +66,41 @@ class DwellingPlace(object):
                 round(self.town.sim.random_number_this_timestep * len(self.owners))
             )
             index_in_owners_of_last_to_leave -= 1
-            last_to_leave = list(self.owners)[index_in_owners_of_last_to_leave]
+            last_to_leave = self.owners_list[index_in_owners_of_last_to_leave]
             if self.town.sim.random_number_this_timestep > last_to_leave.personality.neuroticism:
                 locked = True
         elif self.town.sim.time_of_day == "night":
-            most_neurotic_owner = max(self.owners, key=lambda o: o.personality.neuroticism)
-            if self.town.sim.random_number_this_timestep > most_neurotic_owner.personality.neuroticism:
+            if self.town.sim.random_number_this_timestep > self.most_neurotic_owner.personality.neuroticism:
                 locked = True
         return locked
 
+    def update_owner_attributes(self):
+        """Update the attributes that summarize this dwelling place's owners, which must be
+        done whenever its ownership changes.
+        """
+        self.owners_list = list(self.owners)
+        if self.owners:
+            self.most_neurotic_owner = max(self.owners, key=lambda o: o.personality.neuroticism)
+        else:
+            self.most_neurotic_owner = None
+
+    def register_arrival(self, person):
+        """Register that a person has arrived at this dwelling place for the current timestep."""
+        self.people_here_now.add(person)
+
+    def register_departure(self, person):
+        """Register that a person has left this dwelling place."""
+        self.people_here_now.remove(person)
+
+    def residents_at(self, ordinal_date):
+        """Return the people who lived here as of the end of the given day, in order of when they moved in."""
+        return self.residency_index.at(ordinal_date=ordinal_date)
+
+    def residents_during(self, start_date, end_date):
+        """Return the people who lived here at any point between the given (ordinal) dates, inclusive,
+        in order of when they moved in."""
+        return self.residency_index.during(start_date=start_date, end_date=end_date)
+
     @property
     def name(self):
         """Return the name of this residence."""
@@ -18,11 +18,28 @@ class Routine(object):
         self.person = person
         self.working = False  # Whether or not the person is working on an exact timestep
         self.occasion = None  # A person's purpose for being where they are on a timestep
+        # Cached pools of the people this person could go visit -- friends ('fr'), immediate family
+        # ('if'), and extended family ('ef') who are present in the town and living elsewhere; these
+        # get reset whenever this person or someone in one of these groups moves, departs, or dies,
+        # or whenever the groups themselves change
+        self.visitable_pools = {}
+        self.best_visitable_friend = None  # Visitable friend with the highest charge; None if not yet known
+        self.charge_of_best_visitable_friend = None
+        # People whose pools were built by considering this person, and thus must be reset when
+        # this person moves, departs, or dies
+        self.considered_in_visitable_pools_of = set()
 
     def __str__(self):
         """Return string representation."""
         return "Daily routine of {}".format(self.person.name)
 
+    @property
+    def baseline_chance_of_leaving_home(self):
+        """Return this person's chance of leaving home on a timestep they don't have to work, before
+        adjustments for having kids at home and the time of day.
+        """
+        return (self.person.personality.extroversion + self.person.personality.openness_to_experience) / 2.0
+
     def enact(self):
         """Enact this person's daily routine for a particular timestep."""
         new_location, occasion = self.decide_where_to_go()
@@ -30,61 +47,62 @@ class Routine(object):
         self.working = True if occasion == 'work' else False
         self.person.go_to(destination=new_location, occasion=occasion)
 
-    def decide_where_to_go(self):
+    def decide_where_to_go(self, conditions=None):
         """Return the location at which this person will spend the next timestep, as well as the
         occasion for them doing so.
+
+        @param conditions: The RoutineConditions for this timestep, which RoutinePlanner reads once
+                           for everyone; if this is not given, they are read just for this person.
         """
-        config = self.person.sim.config
+        if conditions is None:
+            conditions = RoutineConditions(sim=self.person.sim)
+        home = self.person.home
         # If they're a kid, potentially send them to school or daycare -- TODO NO DAYCARE IF PARENT HOME
         if not self.person.adult:
-            if self.person.sim.time_of_day == "day":
-                location, occasion = self._go_to_school_or_daycare(), 'school'
-                if location is self.person.home:  # They are very young child and living in a town/time without daycare
+            if conditions.time_of_day == "day":
+                location, occasion = self._go_to_school_or_daycare(conditions=conditions), 'school'
+                if location is home:  # They are very young child and living in a town/time without daycare
                     occasion = 'home'
             else:
-                location, occasion = self.person.home, 'home'  # Kids stay home at night
+                location, occasion = home, 'home'  # Kids stay home at night
         # If they have a job...
-        elif self.person.occupation and self.person.occupation.shift == self.person.sim.time_of_day:
-            if random.random() < config.chance_someone_doesnt_have_to_work_some_day:
-                if random.random() < config.chance_someone_leaves_home_on_day_off[self.person.sim.time_of_day]:
+        elif self.person.occupation and self.person.occupation.shift == conditions.time_of_day:
+            if random.random() < conditions.chance_of_day_off:
+                if random.random() < conditions.config.chance_someone_leaves_home_on_day_off[conditions.time_of_day]:
                     location, occasion = self._go_in_public()
                 else:
-                    location, occasion = self.person.home, 'home'
-            elif random.random() < config.chance_someone_calls_in_sick_to_work:
-                if random.random() < config.chance_someone_leaves_home_on_sick_day:
+                    location, occasion = home, 'home'
+            elif random.random() < conditions.chance_of_calling_in_sick:
+                if random.random() < conditions.chance_of_leaving_home_on_sick_day:
                     location, occasion = self._go_in_public()
                 else:
-                    location, occasion = self.person.home, 'home'
+                    location, occasion = home, 'home'
             else:
                 # We specifically note that they are working, because they could be going into
                 # their place of work on an off-day (e.g., restaurant)
                 location, occasion = self.person.occupation.company, 'work'
         # If they don't have a job...
         else:
-            chance_of_leaving_home = (
-                (self.person.personality.extroversion + self.person.personality.openness_to_experience) / 2.0
-            )
+            chance_of_leaving_home = self.baseline_chance_of_leaving_home
             if self.person.kids_at_home:
-                chance_of_leaving_home *= config.chance_someone_leaves_home_multiplier_due_to_kids
-            floor = config.chance_someone_leaves_home_on_day_off_floor[self.person.sim.time_of_day]
-            cap = config.chance_someone_leaves_home_on_day_off_cap[self.person.sim.time_of_day]
-            if chance_of_leaving_home < floor:
-                chance_of_leaving_home = floor
-            elif chance_of_leaving_home > cap:
-                chance_of_leaving_home = cap
+                chance_of_leaving_home *= conditions.multiplier_due_to_kids
+            if chance_of_leaving_home < conditions.floor:
+                chance_of_leaving_home = conditions.floor
+            elif chance_of_leaving_home > conditions.cap:
+                chance_of_leaving_home = conditions.cap
             if random.random() < chance_of_leaving_home:
                 location, occasion = self._go_in_public()
             else:
-                location, occasion = self.person.home, 'home'
+                location, occasion = home, 'home'
         return location, occasion
 
-    def _go_to_school_or_daycare(self):
+    def _go_to_school_or_daycare(self, conditions):
         """Return the school or day care that this child attends."""
-        person_is_school_age = self.person.age > self.person.sim.config.age_children_start_going_to_school
-        if person_is_school_age and self.person.town.school:
-            school_or_day_care = self.person.town.school
-        elif not person_is_school_age and self.person.town.businesses_of_type('DayCare'):
-            school_or_day_care = self.person.town.businesses_of_type('DayCare')[0]
+        person_is_school_age = self.person.age > conditions.age_children_start_going_to_school
+        if person_is_school_age and conditions.school:
+            school_or_day_care = conditions.school
+        elif not person_is_school_age and conditions.day_care:
+            school_or_day_care = conditions.day_care
         else:
             school_or_day_care = self.person.home  # They stay home
         return school_or_day_care
@@ -113,28 +131,18 @@ class Routine(object):
         # served by that business, e.g., have them actually get a haircut
         # TODO -- have people become loyal to certain businesses (or maybe not because such small town?)
         # Determine the type of service this errand will be for
-        x = random.random()
-        service_type_probs = config.probabilities_of_errand_for_service_type[self.person.sim.time_of_day]
-        service_type_of_errand = next(
-            # See config.py to understand what's going on here
-            e for e in service_type_probs if service_type_probs[e][0] <= x <= service_type_probs[e][1]
-        )
-        businesses_in_town_providing_that_service = [
-            b for b in self.person.town.companies if service_type_of_errand in b.services
-        ]
+        service_type_of_errand = config.errand_service_type_samplers[self.person.sim.time_of_day].draw()
+        town = self.person.town
+        businesses_in_town_providing_that_service = town.providers_of_service(service=service_type_of_errand)
         if businesses_in_town_providing_that_service:
             if random.random() < config.chance_someone_goes_to_closest_business_of_type:
                 # Choose between the one closest to your house and the one closest to your work
-                closest_to_home = min(
-                    businesses_in_town_providing_that_service,
-                    key=lambda business: self.person.town.distance_between(self.person.home.lot, business.lot)
+                closest_to_home = town.nearest_provider_of_service(
+                    lot=self.person.home.lot, service=service_type_of_errand
                 )
                 if self.person.occupation:
-                    closest_to_work = min(
-                        businesses_in_town_providing_that_service,
-                        key=lambda business: self.person.town.distance_between(
-                            self.person.occupation.company.lot, business.lot
-                        )
+                    closest_to_work = town.nearest_provider_of_service(
+                        lot=self.person.occupation.company.lot, service=service_type_of_errand
                     )
                     one_i_will_go_to = closest_to_home if random.random() < 0.5 else closest_to_work
                 else:
@@ -156,21 +164,18 @@ class Routine(object):
     def _visit_someone(self):
         """Return the residence of the person who this person will go visit."""
         config = self.person.sim.config
-        x = random.random()
-        relationship_to_person_who_person_who_will_be_visited = next(
-            r for r in config.who_someone_visiting_will_visit_probabilities if r[0][0] <= x <= r[0][1]
-        )[1]
+        relationship_to_person_who_person_who_will_be_visited = config.who_someone_visiting_will_visit_sampler.draw()
         if (relationship_to_person_who_person_who_will_be_visited == 'nb' and
                 self.person.neighbors):
             person_they_will_visit = self._visit_a_neighbor()
         elif (relationship_to_person_who_person_who_will_be_visited == "fr" and
-                any(f for f in self.person.friends if f.present and f.home is not self.person.home)):
+                self._visitable_pool(relation='fr')):
             person_they_will_visit = self._visit_a_friend()
         elif (relationship_to_person_who_person_who_will_be_visited == "if" and
-                any(f for f in self.person.immediate_family if f.present and f.home is not self.person.home)):
+                self._visitable_pool(relation='if')):
             person_they_will_visit = self._visit_an_immediate_family_member()
         elif (relationship_to_person_who_person_who_will_be_visited == "ef" and
-                any(f for f in self.person.extended_family if f.present and f.home is not self.person.home)):
+                self._visitable_pool(relation='ef')):
             person_they_will_visit = self._visit_an_extended_family_member()
         else:
             # Just stay home lol
@@ -190,14 +195,17 @@ class Routine(object):
 
         TODO: Flesh this out.
         """
-        friends_person_doesnt_live_with = [
-            f for f in self.person.friends if f.present and f.home is not self.person.home
-        ]
+        friends_person_doesnt_live_with = self._visitable_pool(relation='fr')
         if random.random() > 0.5:
             # Visit best friend (who doesn't live with them)
-            friend_they_will_visit = max(
-                friends_person_doesnt_live_with, key=lambda friend: self.person.relationships[friend].charge
-            )
+            if not self.best_visitable_friend:
+                self.best_visitable_friend = max(
+                    friends_person_doesnt_live_with, key=lambda friend: self.person.relationships[friend].charge
+                )
+                self.charge_of_best_visitable_friend = (
+                    self.person.relationships[self.best_visitable_friend].charge
+                )
+            friend_they_will_visit = self.best_visitable_friend
         else:
             friend_they_will_visit = random.choice(friends_person_doesnt_live_with)
         return friend_they_will_visit
@@ -207,9 +215,7 @@ class Routine(object):
 
         TODO: Flesh this out.
         """
-        immediate_family_person_doesnt_live_with = [
-            f for f in self.person.immediate_family if f.present and f.home is not self.person.home
-        ]
+        immediate_family_person_doesnt_live_with = self._visitable_pool(relation='if')
         immediate_family_they_will_visit = random.choice(immediate_family_person_doesnt_live_with)
         return immediate_family_they_will_visit
 
@@ -218,8 +224,131 @@ class Routine(object):
 
         TODO: Flesh this out.
         """
-        extended_family_person_doesnt_live_with = [
-            f for f in self.person.extended_family if f.present and f.home is not self.person.home
-        ]
+        extended_family_person_doesnt_live_with = self._visitable_pool(relation='ef')
         extended_family_they_will_visit = random.choice(extended_family_person_doesnt_live_with)
-        return extended_family_they_will_visit
\ No newline at end of file
+        return extended_family_they_will_visit
+
+    def _visitable_pool(self, relation):
+        """Return a list of the people of the given relation to this person who are present
+        in the town and don't live with them.
+
+        @param relation: Either 'fr' (friends), 'if' (immediate family), or 'ef' (extended family).
+        """
+        if relation not in self.visitable_pools:
+            if relation == 'fr':
+                people_of_this_relation = self.person.friends
+            elif relation == 'if':
+                people_of_this_relation = self.person.immediate_family
+            else:
+                people_of_this_relation = self.person.extended_family
+            self.visitable_pools[relation] = [
+                p for p in people_of_this_relation if p.present and p.home is not self.person.home
+            ]
+            for p in people_of_this_relation:
+                if p.present:  # Only people who are present can move, depart, or die
+                    p.routine.considered_in_visitable_pools_of.add(self.person)
+        return self.visitable_pools[relation]
+
+    def reset_visitable_pools(self):
+        """Forget this person's cached pools of people they could visit."""
+        self.visitable_pools = {}
+        self.best_visitable_friend = None
+        self.charge_of_best_visitable_friend = None
+
+    def reset_visitable_pools_involving_this_person(self):
+        """Forget this person's cached pools, as well as all pools that this person was
+        considered for, which must be done whenever this person moves, departs, or dies.
+        """
+        self.reset_visitable_pools()
+        for other_person in self.considered_in_visitable_pools_of:
+            if other_person.present:  # People who have since died or departed won't visit anyone
+                other_person.routine.reset_visitable_pools()
+        self.considered_in_visitable_pools_of = set()
+
+    def update_best_visitable_friend(self, friend, charge):
+        """Update this person's best visitable friend given a change in their charge toward a friend."""
+        if self.best_visitable_friend:
+            if friend is self.best_visitable_friend:
+                if charge < self.charge_of_best_visitable_friend:
+                    # Someone else may be the best visitable friend now, so figure it out anew when needed
+                    self.best_visitable_friend = None
+                    self.charge_of_best_visitable_friend = None
+                else:
+                    self.charge_of_best_visitable_friend = charge
+            elif charge > self.charge_of_best_visitable_friend and friend in self.visitable_pools['fr']:
+                self.best_visitable_friend = friend
+                self.charge_of_best_visitable_friend = charge
+
+
+class RoutineConditions(object):
+    """The conditions on a timestep that are the same for everyone deciding where to go.
+
+    Routine.decide_where_to_go() makes the decision for one person given these; RoutinePlanner
+    reads them once per timestep for everyone, rather than having each person read them anew.
+    """
+
+    def __init__(self, sim):
+        """Initialize a RoutineConditions object.
+
+        @param sim: The simulation whose current timestep these are the conditions of.
+        """
+        self.config = config = sim.config
+        self.time_of_day = time_of_day = sim.time_of_day
+        # Only children go anywhere on account of school or day care, and only during the day
+        self.school = sim.town.school
+        day_cares = sim.town.businesses_of_type('DayCare') if time_of_day == "day" else []
+        self.day_care = day_cares[0] if day_cares else None
+        self.age_children_start_going_to_school = config.age_children_start_going_to_school
+        self.chance_of_day_off = config.chance_someone_doesnt_have_to_work_some_day
+        self.chance_of_calling_in_sick = config.chance_someone_calls_in_sick_to_work
+        self.chance_of_leaving_home_on_sick_day = config.chance_someone_leaves_home_on_sick_day
+        self.multiplier_due_to_kids = config.chance_someone_leaves_home_multiplier_due_to_kids
+        self.floor = config.chance_someone_leaves_home_on_day_off_floor[time_of_day]
+        self.cap = config.chance_someone_leaves_home_on_day_off_cap[time_of_day]
+
+
+class RoutinePlanner(object):
+    """A planner that decides where everyone in a town will be on a timestep in one batched pass.
+
+    Routine.decide_where_to_go() reads the simulation config, the time of day, and the town's
+    school and day care anew for every single person; this planner reads those once per timestep
+    into a RoutineConditions object, has every person decide given those, and only then moves
+    everyone to their destinations. When the config parameter
+    'check_routine_planner_against_per_person_routines' is set, every plan is checked against the
+    decision each person makes when reading the conditions themselves, from the same random state,
+    which is useful for making sure that nothing read once per timestep goes stale during a pass.
+    """
+
+    def __init__(self, sim):
+        """Initialize a RoutinePlanner object.
+
+        @param sim: The simulation whose population this planner plans routines for.
+        """
+        self.sim = sim
+
+    def enact(self, people):
+        """Decide where each of these people will spend this timestep, and then send them there."""
+        config = self.sim.config
+        if config.check_routine_planner_against_per_person_routines:
+            random_state = random.getstate()
+            plans = self.plan(people=people)
+            random_state_after_planning = random.getstate()
+            random.setstate(random_state)
+            for person, plan in zip(people, plans):
+                if person.routine.decide_where_to_go() != plan:
+                    raise Exception(
+                        "Batched routine planning diverged from per-person routine for {}".format(person.name)
+                    )
+            if random.getstate() != random_state_after_planning:
+                raise Exception("Batched routine planning drew random numbers differently from per-person routines")
+        else:
+            plans = self.plan(people=people)
+        for person, (location, occasion) in zip(people, plans):
+            person.routine.occasion = occasion
+            person.routine.working = True if occasion == 'work' else False
+            person.go_to(destination=location, occasion=occasion)
+
+    def plan(self, people):
+        """Return a list of (location, occasion) tuples specifying where each person will go."""
+        conditions = RoutineConditions(sim=self.sim)
+        return [person.routine.decide_where_to_go(conditions=conditions) for person in people]
@@ -0,0 +1,572 @@
+import multiprocessing
+
+
+class SocialGraph(object):
+    """An index of the social graph of a simulation, keyed by people's integer IDs, for story sifting.
+
+    The graph knows two kinds of relations between people. Indexed relations (e.g., 'dislikes')
+    are stored as adjacency sets in both directions and must be kept up to date by calling
+    relate() whenever they start or stop holding between two people; the story recognizer does
+    this as relationships change (see StoryRecognizer.observe_relationship()). Derived relations
+    (e.g., 'is_sibling_of') are instead read off of attributes that people already maintain,
+    by way of functions supplied when the relations are defined. Attributes of people (e.g.,
+    'resident') are likewise defined by functions.
+    """
+
+    def __init__(self):
+        """Initialize a SocialGraph object."""
+        self.people = {}  # Maps person IDs to people
+        # Maps each indexed relation to a dictionary mapping person IDs to the set of IDs of the
+        # people they bear that relation to (or, for the inverse, who bear it to them); people
+        # with no such edges are left out, so that the number of keys is the size of the domain
+        self.adjacency = {}
+        self.inverse_adjacency = {}
+        self.number_of_edges = {}  # Maps indexed relations to their number of edges
+        # Maps derived relations to (successors_of, symmetric, estimated_fanout) tuples
+        self.derived_relations = {}
+        self.attributes = {}  # Maps attributes to (test, members) tuples
+
+    def define_indexed_relation(self, relation):
+        """Define a relation whose edges will be stored in this graph."""
+        self.adjacency[relation] = {}
+        self.inverse_adjacency[relation] = {}
+        self.number_of_edges[relation] = 0
+
+    def define_derived_relation(self, relation, successors_of, symmetric=False, estimated_fanout=1.0):
+        """Define a relation that is read off of people's own attributes.
+
+        @param relation: The name of the relation.
+        @param successors_of: A function that returns the people a given person bears this relation to.
+        @param symmetric: Whether the relation always holds in both directions, in which case the
+                          query planner may follow it from either end.
+        @param estimated_fanout: The number of people a person typically bears this relation to,
+                                 which the query planner uses to order its joins.
+        """
+        self.derived_relations[relation] = (successors_of, symmetric, estimated_fanout)
+
+    def define_attribute(self, attribute, test, members=None):
+        """Define an attribute that people may have.
+
+        @param attribute: The name of the attribute.
+        @param test: A function that returns whether a given person has this attribute.
+        @param members: Optionally, a function that returns the collection of all the people
+                        having this attribute, which allows the query planner to enumerate them.
+        """
+        self.attributes[attribute] = (test, members)
+
+    def relate(self, relation, person, other_person, holds=True):
+        """Record that an indexed relation does (or, if holds is False, does not) hold from person to other_person."""
+        person_id, other_person_id = person.id, other_person.id
+        adjacency, inverse_adjacency = self.adjacency[relation], self.inverse_adjacency[relation]
+        if holds:
+            if other_person_id not in adjacency.get(person_id, ()):
+                self.people[person_id], self.people[other_person_id] = person, other_person
+                adjacency.setdefault(person_id, set()).add(other_person_id)
+                inverse_adjacency.setdefault(other_person_id, set()).add(person_id)
+                self.number_of_edges[relation] += 1
+        elif other_person_id in adjacency.get(person_id, ()):
+            self._remove_edge(adjacency, person_id, other_person_id)
+            self._remove_edge(inverse_adjacency, other_person_id, person_id)
+            self.number_of_edges[relation] -= 1
+
+    @staticmethod
+    def _remove_edge(adjacency, person_id, other_person_id):
+        """Remove an edge from an adjacency dictionary, dropping the person's entry if it is now empty."""
+        adjacency[person_id].remove(other_person_id)
+        if not adjacency[person_id]:
+            del adjacency[person_id]
+
+    def is_indexed(self, relation):
+        """Return whether the given relation is an indexed one."""
+        return relation in self.adjacency
+
+    def can_follow(self, relation, inverse):
+        """Return whether the successors (or, if inverse is True, the predecessors) of a person under this
+        relation can be looked up."""
+        return not inverse or relation in self.adjacency or self.derived_relations[relation][1]
+
+    def _ids_of(self, people):
+        """Return the set of IDs of these people, recording who they are."""
+        ids = set()
+        for person in people:
+            if person:
+                self.people[person.id] = person
+                ids.add(person.id)
+        return ids
+
+    def successors(self, relation, person_id, inverse=False):
+        """Return the set of IDs of the people that this person bears the relation to (or, if inverse
+        is True, who bear the relation to this person)."""
+        if relation in self.adjacency:
+            adjacency = self.inverse_adjacency[relation] if inverse else self.adjacency[relation]
+            return adjacency.get(person_id, frozenset())
+        successors_of, symmetric, _ = self.derived_relations[relation]
+        if inverse and not symmetric:
+            raise Exception("Cannot look up the predecessors of anyone under the relation '{}'".format(relation))
+        return self._ids_of(successors_of(self.people[person_id]))
+
+    def holds(self, relation, person_id, other_person_id):
+        """Return whether the relation holds from the first person to the second."""
+        return other_person_id in self.successors(relation, person_id)
+
+    def degree(self, relation, person_id):
+        """Return the number of people this person bears the relation to."""
+        return len(self.successors(relation, person_id))
+
+    def domain(self, relation, inverse=False):
+        """Return a set-like view of the IDs of everyone who bears this indexed relation to someone
+        (or, if inverse is True, whom someone bears it to)."""
+        return (self.inverse_adjacency[relation] if inverse else self.adjacency[relation]).viewkeys()
+
+    def fanout(self, relation, inverse=False):
+        """Return the average number of people a person in the domain of this relation bears it to."""
+        if relation in self.adjacency:
+            return float(self.number_of_edges[relation]) / max(1, len(self.domain(relation, inverse)))
+        return self.derived_relations[relation][2]
+
+    def can_enumerate(self, attribute):
+        """Return whether everyone having this attribute can be enumerated."""
+        return self.attributes[attribute][1] is not None
+
+    def members(self, attribute):
+        """Return the set of IDs of everyone having this attribute, or None if they cannot be enumerated."""
+        _, members = self.attributes[attribute]
+        return self._ids_of(members()) if members else None
+
+    def has(self, attribute, person_id):
+        """Return whether this person has the attribute."""
+        test, _ = self.attributes[attribute]
+        return test(self.people[person_id])
+
+    def plan(self, pattern):
+        """Return a plan for matching the given pattern against this graph."""
+        return QueryPlan(pattern=pattern, graph=self)
+
+    def sift(self, pattern):
+        """Return the tuples of IDs of the people that match the given pattern; see QueryPlan.execute()."""
+        return self.plan(pattern).execute()
+
+    def snapshot(self):
+        """Return a read-only copy of this graph, with every relation and attribute materialized over IDs.
+
+        Unlike this graph, the snapshot holds no references to people or to functions of them,
+        so it can be pickled and sifted in other processes (see sift_in_parallel()).
+        """
+        for attribute in self.attributes:
+            if self.can_enumerate(attribute):
+                self.members(attribute)  # Record who the members are
+        # Derived relations and attributes are materialized for everyone the graph knows about, including
+        # anyone first reached along a derived relation; only each person's own successors are recorded,
+        # exactly as this graph would look them up, so that sifting the snapshot finds the same matches
+        derived_adjacency = {relation: {} for relation in self.derived_relations}
+        person_ids = set()
+        to_materialize = set(self.people)
+        while to_materialize:
+            for person_id in to_materialize:
+                for relation, adjacency in derived_adjacency.iteritems():
+                    successor_ids = self.successors(relation, person_id)
+                    if successor_ids:
+                        adjacency[person_id] = set(successor_ids)
+            person_ids |= to_materialize
+            to_materialize = set(self.people) - person_ids
+        attribute_members = {}
+        for attribute in self.attributes:
+            if self.can_enumerate(attribute):
+                attribute_members[attribute] = self.members(attribute)
+            else:
+                attribute_members[attribute] = {i for i in person_ids if self.has(attribute, i)}
+        return SocialGraphSnapshot(
+            adjacency=self.adjacency, inverse_adjacency=self.inverse_adjacency, derived_adjacency=derived_adjacency,
+            derived_relations=self.derived_relations, attribute_members=attribute_members
+        )
+
+
+class SocialGraphSnapshot(SocialGraph):
+    """A read-only copy of a social graph over people's IDs alone; see SocialGraph.snapshot().
+
+    Since a snapshot knows nothing of the people themselves, it cannot check Constraint clauses.
+    """
+
+    def __init__(self, adjacency, inverse_adjacency, derived_adjacency, derived_relations, attribute_members):
+        """Initialize a SocialGraphSnapshot object."""
+        super(SocialGraphSnapshot, self).__init__()
+        for relation in adjacency:
+            self.adjacency[relation] = self._freeze(adjacency[relation])
+            self.inverse_adjacency[relation] = self._freeze(inverse_adjacency[relation])
+            self.number_of_edges[relation] = sum(len(ids) for ids in adjacency[relation].itervalues())
+        for relation in derived_adjacency:
+            self.adjacency[relation] = self._freeze(derived_adjacency[relation])
+            # Derived relations can only be followed backward if they are symmetric
+            _, symmetric, estimated_fanout = derived_relations[relation]
+            if symmetric:
+                self.inverse_adjacency[relation] = self.adjacency[relation]
+            self.derived_relations[relation] = (None, symmetric, estimated_fanout)
+        self.attribute_members = {attribute: frozenset(ids) for attribute, ids in attribute_members.items()}
+
+    @staticmethod
+    def _freeze(adjacency):
+        """Return a copy of this adjacency dictionary whose sets are frozen."""
+        return {person_id: frozenset(ids) for person_id, ids in adjacency.iteritems()}
+
+    def relate(self, relation, person, other_person, holds=True):
+        """Raise an exception, since a snapshot cannot be changed."""
+        raise Exception("A snapshot of a social graph cannot be changed")
+
+    def is_indexed(self, relation):
+        """Return whether the given relation's domain can be enumerated, which in a snapshot is
+        only the case for relations that were indexed in the original graph."""
+        return relation in self.number_of_edges
+
+    def can_follow(self, relation, inverse):
+        """Return whether the successors (or, if inverse is True, the predecessors) of a person under this
+        relation can be looked up."""
+        return not inverse or relation in self.inverse_adjacency
+
+    def successors(self, relation, person_id, inverse=False):
+        """Return the set of IDs of the people that this person bears the relation to (or, if inverse
+        is True, who bear the relation to this person)."""
+        if inverse and relation not in self.inverse_adjacency:
+            raise Exception("Cannot look up the predecessors of anyone under the relation '{}'".format(relation))
+        adjacency = self.inverse_adjacency[relation] if inverse else self.adjacency[relation]
+        return adjacency.get(person_id, frozenset())
+
+    def fanout(self, relation, inverse=False):
+        """Return the average number of people a person in the domain of this relation bears it to."""
+        if relation in self.number_of_edges:
+            return float(self.number_of_edges[relation]) / max(1, len(self.domain(relation, inverse)))
+        return self.derived_relations[relation][2]
+
+    def can_enumerate(self, attribute):
+        """Return whether everyone having this attribute can be enumerated, which in a snapshot is always the case."""
+        return True
+
+    def members(self, attribute):
+        """Return the set of IDs of everyone having this attribute."""
+        return self.attribute_members[attribute]
+
+    def has(self, attribute, person_id):
+        """Return whether this person has the attribute."""
+        return person_id in self.attribute_members[attribute]
+
+
+# The snapshot that is being sifted in a worker process of sift_in_parallel()
+_snapshot_in_this_process = None
+
+
+def _adopt_snapshot(snapshot):
+    """Set the snapshot that this worker process will sift."""
+    global _snapshot_in_this_process
+    _snapshot_in_this_process = snapshot
+
+
+def _sift_snapshot(pattern):
+    """Return the matches for this pattern in this worker process's snapshot."""
+    return _snapshot_in_this_process.sift(pattern)
+
+
+def sift_in_parallel(snapshot, patterns, processes):
+    """Return a list of the matches for each of these patterns (in the same order), as sifted from
+    the given snapshot by a pool of worker processes."""
+    pool = multiprocessing.Pool(processes=processes, initializer=_adopt_snapshot, initargs=(snapshot,))
+    try:
+        # Each pattern is its own task, and the results come back in the order of the patterns
+        return pool.map(_sift_snapshot, patterns, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+class Pattern(object):
+    """A pattern for sifting stories out of a social graph.
+
+    A pattern has roles, which are filled by distinct people, and clauses, which constrain
+    who may fill them, e.g., Relation('lover', 'is_captivated_by', 'beloved').
+    """
+
+    def __init__(self, name, roles, clauses, deduplicate=False):
+        """Initialize a Pattern object.
+
+        @param name: A name for this pattern.
+        @param roles: A tuple of the names of the roles in this pattern, in the order in which
+                      the people filling them will be reported.
+        @param clauses: A list of Relation, Attribute, Degree, and Constraint objects.
+        @param deduplicate: Whether to report only one match for any set of people, e.g., when the
+                            pattern is symmetric; the one reported is the first in order of their IDs.
+        """
+        self.name = name
+        self.roles = tuple(roles)
+        self.clauses = list(clauses)
+        self.deduplicate = deduplicate
+        for clause in self.clauses:
+            for role in clause.roles:
+                if role not in self.roles:
+                    raise Exception("Pattern '{}' has no role '{}'".format(name, role))
+
+    def __str__(self):
+        """Return string representation."""
+        return "A sifting pattern for {name}: {clauses}".format(
+            name=self.name, clauses='; '.join(str(clause) for clause in self.clauses)
+        )
+
+
+class Relation(object):
+    """A clause requiring (or, if negated, forbidding) that a relation hold from one role to another."""
+
+    def __init__(self, role, relation, other_role, negated=False):
+        """Initialize a Relation object."""
+        self.roles = (role, other_role)
+        self.relation = relation
+        self.negated = negated
+
+    def __str__(self):
+        """Return string representation."""
+        return "{}{} {} {}".format('not ' if self.negated else '', self.roles[0], self.relation, self.roles[1])
+
+    def holds(self, graph, binding):
+        """Return whether this clause holds for the given binding of roles to person IDs."""
+        return graph.holds(self.relation, binding[self.roles[0]], binding[self.roles[1]]) is not self.negated
+
+
+class Attribute(object):
+    """A clause requiring (or, if negated, forbidding) that the person in a role have an attribute."""
+
+    def __init__(self, role, attribute, negated=False):
+        """Initialize an Attribute object."""
+        self.roles = (role,)
+        self.attribute = attribute
+        self.negated = negated
+
+    def __str__(self):
+        """Return string representation."""
+        return "{} is {}{}".format(self.roles[0], 'not ' if self.negated else '', self.attribute)
+
+    def holds(self, graph, binding):
+        """Return whether this clause holds for the given binding of roles to person IDs."""
+        return graph.has(self.attribute, binding[self.roles[0]]) is not self.negated
+
+
+class Degree(object):
+    """A clause requiring that the person in a role bear a relation to at least some number of people."""
+
+    def __init__(self, role, relation, at_least):
+        """Initialize a Degree object."""
+        self.roles = (role,)
+        self.relation = relation
+        self.at_least = at_least
+
+    def __str__(self):
+        """Return string representation."""
+        return "{} {} at least {} people".format(self.roles[0], self.relation, self.at_least)
+
+    def holds(self, graph, binding):
+        """Return whether this clause holds for the given binding of roles to person IDs."""
+        return graph.degree(self.relation, binding[self.roles[0]]) >= self.at_least
+
+
+class Constraint(object):
+    """A clause requiring that an arbitrary test hold of the people in some roles."""
+
+    def __init__(self, roles, test, description='a constraint'):
+        """Initialize a Constraint object.
+
+        @param roles: The roles whose people will be passed to the test, in order.
+        @param test: A function of the people in those roles that returns whether the clause holds.
+        @param description: A description of the test, for string representations.
+        """
+        self.roles = tuple(roles)
+        self.test = test
+        self.description = description
+
+    def __str__(self):
+        """Return string representation."""
+        return "{} ({})".format(self.description, ', '.join(self.roles))
+
+    def holds(self, graph, binding):
+        """Return whether this clause holds for the given binding of roles to person IDs."""
+        return self.test(*[graph.people[binding[role]] for role in self.roles])
+
+
+class QueryPlan(object):
+    """A plan for matching a pattern against a social graph.
+
+    Roles are bound one at a time. The first role to be bound is the one with the smallest set
+    of candidates that can be enumerated, i.e., the members of an attribute or the domain of an
+    indexed relation; each subsequent role is reached by following the relation clause, among
+    those linking it to a role that is already bound, with the smallest average fanout. Any
+    other relation clauses linking a role to roles that are already bound are applied to its
+    candidates as set intersections (or, if negated, differences), and every remaining clause
+    is checked as soon as all of its roles are bound, so that partial matches are pruned as
+    early as possible.
+    """
+
+    def __init__(self, pattern, graph):
+        """Initialize a QueryPlan object."""
+        self.pattern = pattern
+        self.graph = graph
+        self.steps = self._plan()
+
+    def _plan(self):
+        """Return a list of steps, each binding one role of the pattern."""
+        steps = []
+        bound_roles = set()
+        unchecked_clauses = list(self.pattern.clauses)
+        while len(bound_roles) < len(self.pattern.roles):
+            unbound_roles = [role for role in self.pattern.roles if role not in bound_roles]
+            candidate_steps = []
+            for role in unbound_roles:
+                candidate_steps += self._ways_to_reach(role, bound_roles, unchecked_clauses)
+            if not candidate_steps:
+                for role in unbound_roles:
+                    candidate_steps += self._ways_to_enumerate(role, unchecked_clauses)
+            if not candidate_steps:
+                raise Exception(
+                    "Cannot enumerate candidates for any of the roles {} in pattern '{}'".format(
+                        unbound_roles, self.pattern.name
+                    )
+                )
+            step = min(candidate_steps, key=lambda s: s.cost)
+            # Enumerating the domain of a relation only narrows the candidates down to people with
+            # at least one such edge, so in that case the source clause must still be checked
+            if isinstance(step.source, Attribute) or step.from_role is not None:
+                unchecked_clauses.remove(step.source)
+            for clause in list(unchecked_clauses):
+                if not bound_roles.union((step.role,)).issuperset(clause.roles):
+                    continue
+                unchecked_clauses.remove(clause)
+                if isinstance(clause, Relation) and step.role in clause.roles and clause.roles[0] != clause.roles[1]:
+                    from_role = clause.roles[0] if step.role == clause.roles[1] else clause.roles[1]
+                    inverse = step.role == clause.roles[0]
+                    if self.graph.can_follow(clause.relation, inverse):
+                        step.filters.append((clause, from_role, inverse))
+                        continue
+                step.checks.append(clause)
+            # Intersections shrink the set of candidates, so do them first
+            step.filters.sort(key=lambda f: f[0].negated)
+            bound_roles.add(step.role)
+            steps.append(step)
+        return steps
+
+    def _ways_to_enumerate(self, role, clauses):
+        """Return steps that bind this role by enumerating an attribute or the domain of an indexed relation."""
+        graph = self.graph
+        steps = []
+        for clause in clauses:
+            if isinstance(clause, Attribute) and not clause.negated:
+                if clause.roles == (role,) and graph.can_enumerate(clause.attribute):
+                    steps.append(_Step(role=role, source=clause, cost=len(graph.members(clause.attribute))))
+            elif isinstance(clause, Relation) and not clause.negated and graph.is_indexed(clause.relation):
+                if role in clause.roles:
+                    inverse = role == clause.roles[1]
+                    cost = len(graph.domain(clause.relation, inverse))
+                    steps.append(_Step(role=role, source=clause, cost=cost, inverse=inverse))
+            elif isinstance(clause, Degree) and clause.at_least > 0 and graph.is_indexed(clause.relation):
+                if clause.roles == (role,):
+                    steps.append(_Step(role=role, source=clause, cost=len(graph.domain(clause.relation))))
+        return steps
+
+    def _ways_to_reach(self, role, bound_roles, clauses):
+        """Return steps that bind this role by following a relation from a role that is already bound."""
+        graph = self.graph
+        steps = []
+        for clause in clauses:
+            if not isinstance(clause, Relation) or clause.negated or role not in clause.roles:
+                continue
+            other_role = clause.roles[0] if role == clause.roles[1] else clause.roles[1]
+            # Reaching the clause's first role from its second means following the relation backward
+            inverse = role == clause.roles[0]
+            if other_role in bound_roles and graph.can_follow(clause.relation, inverse):
+                cost = graph.fanout(clause.relation, inverse)
+                steps.append(_Step(role=role, source=clause, cost=cost, inverse=inverse, from_role=other_role))
+        return steps
+
+    def explain(self):
+        """Return a list of strings describing the steps of this plan."""
+        return ["{}. {}".format(i+1, step) for i, step in enumerate(self.steps)]
+
+    def execute(self):
+        """Return a sorted list of the tuples of IDs of the people filling the pattern's roles in each match."""
+        matches = []
+        self._extend(binding={}, step_index=0, matches=matches)
+        matches.sort()
+        if self.pattern.deduplicate:
+            sets_of_people_matched = set()
+            deduplicated_matches = []
+            for match in matches:
+                if frozenset(match) not in sets_of_people_matched:
+                    sets_of_people_matched.add(frozenset(match))
+                    deduplicated_matches.append(match)
+            matches = deduplicated_matches
+        return matches
+
+    def _extend(self, binding, step_index, matches):
+        """Extend a partial binding of roles to person IDs by carrying out the remaining steps."""
+        if step_index == len(self.steps):
+            matches.append(tuple(binding[role] for role in self.pattern.roles))
+            return
+        graph = self.graph
+        step = self.steps[step_index]
+        checks = step.checks
+        people_bound = set(binding.values())
+        for candidate in step.candidates(graph, binding):
+            if candidate in people_bound:
+                continue
+            binding[step.role] = candidate
+            if all(check.holds(graph, binding) for check in checks):
+                self._extend(binding=binding, step_index=step_index+1, matches=matches)
+        binding.pop(step.role, None)
+
+
+class _Step(object):
+    """A step of a query plan, which binds a role to each of a set of candidates in turn."""
+
+    def __init__(self, role, source, cost, inverse=False, from_role=None):
+        """Initialize a _Step object.
+
+        @param role: The role that this step binds.
+        @param source: The clause that supplies the candidates.
+        @param cost: The estimated number of candidates.
+        @param inverse: Whether the source is a relation that is to be followed backward.
+        @param from_role: If the source is a relation, the already bound role to follow it from;
+                          if None, the candidates are enumerated.
+        """
+        self.role = role
+        self.source = source
+        self.cost = cost
+        self.inverse = inverse
+        self.from_role = from_role
+        # These get set by QueryPlan._plan(); filters are (clause, from_role, inverse) tuples
+        # for relation clauses to apply to the candidates as set operations
+        self.filters = []
+        self.checks = []
+
+    def __str__(self):
+        """Return string representation."""
+        if isinstance(self.source, Attribute):
+            origin = "enumerate everyone who is {}".format(self.source.attribute)
+        elif isinstance(self.source, Degree) or self.from_role is None:
+            origin = "enumerate everyone who {} someone".format(
+                'is the object of {}'.format(self.source.relation) if self.inverse else self.source.relation
+            )
+        else:
+            origin = "follow {}{} from {}".format(
+                self.source.relation, ' backward' if self.inverse else '', self.from_role
+            )
+        s = "bind {role}: {origin} (~{cost:.1f})".format(role=self.role, origin=origin, cost=self.cost)
+        if self.filters:
+            s += "; filter by {}".format('; '.join(str(clause) for clause, _, _ in self.filters))
+        if self.checks:
+            s += "; check {}".format('; '.join(str(check) for check in self.checks))
+        return s
+
+    def candidates(self, graph, binding):
+        """Return the IDs of the candidates for this step's role, given the binding so far."""
+        if isinstance(self.source, Attribute):
+            candidates = graph.members(self.source.attribute)
+        elif self.from_role is None:
+            candidates = graph.domain(self.source.relation, self.inverse)
+        else:
+            candidates = graph.successors(self.source.relation, binding[self.from_role], inverse=self.inverse)
+        for clause, from_role, inverse in self.filters:
+            related = graph.successors(clause.relation, binding[from_role], inverse=inverse)
+            candidates = candidates - related if clause.negated else candidates & related
+        return candidates
@@ -5,6 +5,12 @@ from business import *
 from config import Config
 from town import *
 from drama import StoryRecognizer
+from routine import RoutinePlanner
+from name_index import NameIndex
+from entity_registry import EntityRegistry
+from demographics import DemographicRecorder
+from history import TownHistory
+from archive import PersonArchive
 
 
 class Simulation(object):
@@ -18,6 +24,8 @@ class Simulation(object):
         # which affords a persistent ID for each person
         self.current_person_id = 0
         self.current_place_id = 0
+        # Prepare a registry that resolves these IDs (and those of lots, parcels, and streets)
+        self.registry = EntityRegistry(sim=self)
         self.year = self.config.date_worldgen_begins[0]
         self.true_year = self.config.date_worldgen_begins[0]  # True year never gets changed during retconning
         self.ordinal_date = datetime.date(*self.config.date_worldgen_begins).toordinal()  # Days since 01-01-0001
@@ -48,19 +56,29 @@ class Simulation(object):
         # Keep track of some metadata about timesteps that have actually been simulated
         self.last_simulated_day = self.ordinal_date
         self.n_simulated_timesteps = 0
+        # Prepare a recorder of yearly demographic aggregates (population, births, deaths, etc.)
+        self.demographics = DemographicRecorder(sim=self)
+        # Prepare a record of who lives in the town, who lives where, and who owns what over time
+        self.history = TownHistory(sim=self)
+        # Prepare a compressed store for the state of people who are no longer in the town
+        self.archive = PersonArchive(sim=self)
+        # Prepare an index of the names of everyone and every company in the simulation
+        self.name_index = NameIndex(sim=self)
         # Prepare a story recognizer -- this a module whose job is to excavate nuggets of dramatic
         # intrigue from the raw emergent material generated by this simulation
         self.story_recognizer = StoryRecognizer(simulation=self)
+        # Prepare a planner that decides where everyone in town will be on each simulated timestep
+        self.routine_planner = RoutinePlanner(sim=self)
 
     @property
     def random_person(self):
         """Return a random person living in the town of this simulation instance."""
-        return random.choice(list(self.town.residents))
+        return self.town.residents.random_choice()
 
     @property
     def random_company(self):
         """Return a random company in the town of this simulation instance."""
-        return random.choice(list(self.town.companies))
+        return self.town.companies.random_choice()
 
     def recent_events(self):
         """Pretty-print the last five simulated events (for debugging purposes)."""
@@ -126,6 +144,7 @@ class Simulation(object):
         Also add the event to a listing of all simulated events; this facilitates debugging.
         """
         self.events.append(new_event)
+        self.demographics.observe_event(event=new_event)
         self.event_number += 1
         return self.event_number
 
@@ -196,12 +215,16 @@ class Simulation(object):
 
     def _update_date(self):
         """Update the current date, given that it's a new day."""
+        # Snapshot the town's history as of the end of the day that just ended, if it's time to
+        self.history.potentially_take_snapshot()
         # Increment the ordinate date
         self.ordinal_date += 1
         # Use that to update the current date
         new_date_tuple = datetime.date.fromordinal(self.ordinal_date)
         if new_date_tuple.year != self.year:
             # Happy New Year
+            self.demographics.record_end_of_year(year=self.year)
+            self.archive.archive_absent_people()
             self.true_year = new_date_tuple.year
             self.year = new_date_tuple.year
         self.month = new_date_tuple.month
@@ -358,8 +381,7 @@ class Simulation(object):
             for other_person in person.relationships:
                 person.relationships[other_person].interacted_this_timestep = False
         # Have people go to the location they will be at this timestep
-        for person in list(self.town.residents):
-            person.routine.enact()
+        self.routine_planner.enact(people=list(self.town.residents))
         # Have people initiate social interactions with one another
         for person in list(self.town.residents):
             # Person may have married (during an earlier iteration of this loop) and
@@ -460,6 +482,7 @@ class Simulation(object):
             if (not person.college_graduate and person.age > 22 and
                     person.male if self.year < 1920 else True):
                 person.college_graduate = True
+                self.town.reindex_worker(person=person)
             elif random.random() < self.config.chance_an_unemployed_person_departs_on_a_simulated_timestep:
                 if not (person.spouse and person.spouse.occupation):
                     person.depart_town()
@@ -472,48 +495,59 @@ class Simulation(object):
 
     def find(self, name):
         """Return person living in this town with that name."""
-        if any(p for p in self.town.residents if p.name == name):
-            people_named_this = [p for p in self.town.residents if p.name == name]
-            if len(people_named_this) > 1:
-                print '\nWarning: Multiple {} residents are named {}; returning a complete list\n'.format(
-                    self.town.name, name
-                )
-                return people_named_this
-            else:
-                return people_named_this[0]
+        people_named_this = [p for p in self.name_index.people_named(name) if p in self.town.residents]
+        if len(people_named_this) > 1:
+            print '\nWarning: Multiple {} residents are named {}; returning a complete list\n'.format(
+                self.town.name, name
+            )
+            return people_named_this
+        elif people_named_this:
+            return people_named_this[0]
         else:
             raise Exception('There is no one in {} named {}'.format(self.town.name, name))
 
     def find_deceased(self, name):
         """Return deceased person with that name."""
-        if any(p for p in self.town.deceased if p.name == name):
-            people_named_this = [p for p in self.town.deceased if p.name == name]
-            if len(people_named_this) > 1:
-                print '\nWarning: Multiple {} residents are named {}; returning a complete list\n'.format(
-                    self.town.name, name
-                )
-                return people_named_this
-            else:
-                return people_named_this[0]
+        people_named_this = [p for p in self.name_index.people_named(name) if p in self.town.deceased]
+        if len(people_named_this) > 1:
+            print '\nWarning: Multiple {} residents are named {}; returning a complete list\n'.format(
+                self.town.name, name
+            )
+            return people_named_this
+        elif people_named_this:
+            return people_named_this[0]
         else:
-            raise Exception('There is no one named {} who died in {]'.format(name, self.town.name))
+            raise Exception('There is no one named {} who died in {}'.format(name, self.town.name))
+
+    def find_by_prefix(self, prefix):
+        """Return a sorted list of the names of all people and companies whose names start with the prefix."""
+        return self.name_index.names_starting_with(prefix)
+
+    def find_by_id(self, person_id):
+        """Return person with the given persistent ID (as emitted by the town exporters)."""
+        return self.registry.person(person_id=person_id)
 
     def find_by_hex(self, hex_value):
-        """Return person whose ID in memory has the given hex value."""
+        """Return person whose ID in memory has the given hex value.
+
+        This is a holdover from before people were registered by their persistent IDs;
+        prefer find_by_id().
+        """
         int_of_hex = int(hex_value, 16)
+        town = self.town
         try:
-            person = next(
-                p for p in self.town.residents | self.town.deceased | self.town.departed if
-                id(p) == int_of_hex
-            )
-            return person
+            person = next(p for p in self.registry.entities['person'].itervalues() if id(p) == int_of_hex)
         except StopIteration:
             raise Exception('There is no one with that hex ID')
+        # Like before, only match people who have lived in the town
+        if person not in town.residents and person not in town.deceased and person not in town.departed:
+            raise Exception('There is no one with that hex ID')
+        return person
 
     def find_co(self, name):
         """Return company in this town with the given name."""
         try:
-            company = next(c for c in self.town.companies if c.name == name)
+            company = next(c for c in self.name_index.companies_named(name) if c in self.town.companies)
             return company
         except StopIteration:
             raise Exception('There is no company in {} named {}'.format(self.town.name, name))
\ No newline at end of file
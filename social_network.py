@@ -0,0 +1,111 @@
+from array import array
+
+try:
+    import numpy
+    import scipy.sparse
+except ImportError:  # NumPy and SciPy are optional; they are only needed for SocialNetwork.to_scipy()
+    numpy = None
+    scipy = None
+
+
+class SocialNetwork(object):
+    """An export of the relationships among a set of people, in compressed sparse row (CSR) format.
+
+    Rows and columns are indexed by person ID, so that row i holds the relationships of the
+    person whose ID is i. The column indices of every relationship are stored, row by row, in
+    self.indices, with row i spanning self.indices[self.indptr[i]:self.indptr[i+1]]; the
+    charge, spark, total number of interactions, and type of each relationship are stored in
+    parallel arrays aligned with self.indices. These are exactly the arrays that make up a
+    SciPy CSR matrix, so to_scipy() can wrap them without copying, but the analytics in
+    network_analytics.py work on them directly, so that neither NumPy nor SciPy is required.
+    """
+
+    # Relationship types, whose positions in this tuple are the codes in self.relationship_type
+    RELATIONSHIP_TYPES = ('acquaintance', 'friendship', 'enmity')
+
+    def __init__(self, people, archive=None):
+        """Initialize a SocialNetwork object by exporting relationships in one pass.
+
+        @param people: The people whose relationships with one another will be exported (e.g.,
+                       the town's residents); relationships with anyone else are left out.
+        @param archive: Optionally, the simulation's PersonArchive, from which the relationships of
+                        (and with) anyone who has been archived will be read without rehydrating them;
+                        if this is not given, touching their relationships rehydrates them.
+        """
+        people_by_id = {person.id: person for person in people}
+        if archive:
+            relationships_of = {
+                person.id: relationships for person, relationships in archive.relationships_of(people=people).iteritems()
+            }
+        else:
+            # Touching everyone's relationships first rehydrates anyone who has been archived (see
+            # PersonArchive), which restores others' relationships with them before any are exported
+            relationships_of = {person_id: person.relationships for person_id, person in people_by_id.iteritems()}
+        self.person_ids = sorted(people_by_id)
+        number_of_rows = self.person_ids[-1] + 1 if self.person_ids else 0
+        self.shape = (number_of_rows, number_of_rows)
+        self.indptr = array('l', [0])
+        self.indices = array('l')
+        self.charge = array('d')
+        self.spark = array('d')
+        self.total_interactions = array('l')
+        self.relationship_type = array('b')
+        type_codes = {relationship_type: code for code, relationship_type in enumerate(self.RELATIONSHIP_TYPES)}
+        next_row = 0
+        for person_id in self.person_ids:
+            # Rows for IDs of people who are not included are left empty
+            self.indptr.extend([len(self.indices)] * (person_id - next_row))
+            relationships = relationships_of[person_id]
+            # Keep the column indices of each row sorted, as is canonical for CSR
+            for other_person_id, other_person in sorted((p.id, p) for p in relationships if p.id in people_by_id):
+                relationship = relationships[other_person]
+                self.indices.append(other_person_id)
+                self.charge.append(relationship.charge)
+                self.spark.append(relationship.spark)
+                self.total_interactions.append(relationship.total_interactions)
+                self.relationship_type.append(type_codes[relationship.type])
+            self.indptr.append(len(self.indices))
+            next_row = person_id + 1
+
+    def __str__(self):
+        """Return string representation."""
+        return "A social network of {n_people} people with {n_relationships} relationships".format(
+            n_people=len(self.person_ids), n_relationships=len(self.indices)
+        )
+
+    def neighbors(self, person_id, relationship_types=None):
+        """Return a list of the IDs of the people this person has relationships with.
+
+        @param person_id: The ID of the person.
+        @param relationship_types: Optionally, a collection of relationship types (e.g., ('friendship',))
+                                   to restrict the relationships to.
+        """
+        if person_id >= self.shape[0]:
+            return []
+        start, end = self.indptr[person_id], self.indptr[person_id+1]
+        if relationship_types is None:
+            return list(self.indices[start:end])
+        codes = self.type_codes(relationship_types)
+        relationship_type = self.relationship_type
+        return [self.indices[i] for i in xrange(start, end) if relationship_type[i] in codes]
+
+    def type_codes(self, relationship_types):
+        """Return the set of codes for the given relationship types."""
+        return {self.RELATIONSHIP_TYPES.index(relationship_type) for relationship_type in relationship_types}
+
+    def to_scipy(self, attribute='charge'):
+        """Return a SciPy CSR matrix of one attribute of the relationships in this network.
+
+        @param attribute: 'charge', 'spark', 'total_interactions', or 'relationship_type'.
+        """
+        if scipy is None:
+            raise Exception("Exporting a social network to a SciPy matrix requires NumPy and SciPy")
+        data = getattr(self, attribute)
+        return scipy.sparse.csr_matrix(
+            (
+                numpy.frombuffer(data, dtype=data.typecode),
+                numpy.frombuffer(self.indices, dtype=self.indices.typecode),
+                numpy.frombuffer(self.indptr, dtype=self.indptr.typecode)
+            ),
+            shape=self.shape
+        )
@@ -28,6 +28,8 @@ print "\nIt is now the {date}, in the town of {town}, pop. {population}.\n".form
     town=sim.town.name,
     population=sim.town.population
 )
+# Print out statistics about the chains of hirings that vacancies set off during worldgen
+sim.town.hiring_chain.report()
 # Start excavating nuggets of dramatic intrigue from the raw emergent material produced
 # during the simulation of the town's history
 print "Excavating nuggets of dramatic intrigue..."
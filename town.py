@@ -1,5 +1,6 @@
 import random
 from business import *
+from job_market import JobMarket, LaborPool, TradeRegistry, HiringChain
 from residence import *
 from occupation import *
 import pyqtree
@@ -7,6 +8,7 @@ from random import gauss,randrange
 from corpora import Names
 from config import Config
 import heapq
+from utils import IndexedSet
 
 
 class Town(object):
@@ -20,17 +22,27 @@ class Town(object):
         self.sim = sim
         self.founded = sim.year
         self.settlers = set()  # Will get added to during Simulation.establish_setting()
-        self.residents = set()
+        # Residents, companies, and dwelling places are kept in indexed sets, which support
+        # constant-time random choice and iterate in a deterministic order
+        self.residents = IndexedSet()
         self.departed = set()  # People who left the town (i.e., left the simulation)
         self.deceased = set()  # People who died in in the town
-        self.companies = set()
+        self.companies = IndexedSet()
         self.former_companies = set()
         self.lots = set()
         self.tracts = set()
-        self.dwelling_places = set()  # Both houses and apartment units (not complexes)
+        self.dwelling_places = IndexedSet()  # Both houses and apartment units (not complexes)
         self.streets = set()
         self.parcels = set()
         self.blocks = set()
+        self.job_market = JobMarket(town=self)  # Indexes the supplemental job vacancies at all companies
+        self.labor_pool = LaborPool(town=self)  # Indexes the people who may be considered for job vacancies
+        self.hiring_chain = HiringChain(town=self)  # Resolves the chains of hirings set off by vacancies
+        self.trades = TradeRegistry(town=self)  # Indexes residents by the occupation they practice
+        self.service_providers = {}  # Maps service types to lists of the companies providing them
+        # Maps service types to dictionaries mapping lots to the company providing that service
+        # that is nearest to that lot; gets invalidated when a provider opens or closes
+        self.nearest_service_providers = {}
         self.generate_lots(sim.config)
         for lot in self.lots | self.tracts:
             lot.set_neighboring_lots_for_town_generation()
@@ -205,6 +217,35 @@ class Town(object):
         else:
             return None
         
+    def add_service_provider(self, company):
+        """Index a newly opened company under each of the services it provides."""
+        for service in company.services:
+            if service not in self.service_providers:
+                self.service_providers[service] = []
+            self.service_providers[service].append(company)
+            self.nearest_service_providers[service] = {}
+
+    def remove_service_provider(self, company):
+        """Remove a now closed company from the index of service providers."""
+        for service in company.services:
+            self.service_providers[service].remove(company)
+            self.nearest_service_providers[service] = {}
+
+    def providers_of_service(self, service):
+        """Return a list of the companies in this town that provide the given service."""
+        return self.service_providers.get(service, [])
+
+    def nearest_provider_of_service(self, lot, service):
+        """Return the company providing the given service that is nearest to this lot, if any."""
+        nearest_providers = self.nearest_service_providers.setdefault(service, {})
+        if lot not in nearest_providers:
+            providers = self.providers_of_service(service)
+            if providers:
+                nearest_providers[lot] = min(providers, key=lambda company: self.distance_between(lot, company.lot))
+            else:
+                nearest_providers[lot] = None
+        return nearest_providers[lot]
+
     def dist_to_nearest_business_of_type(self, lot, business_type, exclusion):
         """Return the Manhattan distance between this lot and the nearest company of the given type.
 
@@ -572,7 +613,14 @@ class Town(object):
 
         @param occupation: The class pertaining to the occupation in question.
         """
-        return [resident for resident in self.residents if isinstance(resident.occupation, occupation)]
+        return list(self.trades.workers_of_trade(occupation))
+
+    def reindex_worker(self, person):
+        """Update this town's labor-force indexes to reflect a change in this person's employment
+        or residence (see job_market.py).
+        """
+        self.labor_pool.update(person=person)
+        self.trades.update(person=person)
 
     def businesses_of_type(self, business_type):
         """Return all business in this town of the given type.
@@ -625,6 +673,7 @@ class Street(object):
         """Initialize a Street object."""
         self.id = Street.counter
         Street.counter += 1
+        town.sim.registry.register(kind='street', entity=self)
         self.town = town
         self.number = number
         self.direction = direction  # Direction relative to the center of the town
@@ -676,6 +725,7 @@ class Parcel(object):
         """Initialize a Parcel object."""
         self.id = Parcel.counter
         Parcel.counter += 1
+        street.town.sim.registry.register(kind='parcel', entity=self)
         self.street = street
         self.number = number
         self.lots = []
@@ -747,6 +797,7 @@ class Lot(object):
         """Initialize a Lot object."""
         self.id = Lot.counter
         Lot.counter += 1
+        town.sim.registry.register(kind='lot', entity=self)
         self.lot = True if self.__class__ is Lot else False
         self.tract = True if self.__class__ is Tract else False
         self.town = town
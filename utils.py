@@ -1,3 +1,8 @@
+import collections
+import random
+from bisect import bisect_right
+
+
 def fit_probability_distribution(relative_frequencies_dictionary):
     """Return a probability distribution fitted to the given relative-frequencies dictionary.
 
@@ -22,3 +27,144 @@ def fit_probability_distribution(relative_frequencies_dictionary):
         fitted_probability_distribution[last_bound_attributed][0], 1.0
     )
     return fitted_probability_distribution
+
+
+class Sampler(object):
+    """A compiled sampler for a probability distribution of the kind used throughout this codebase.
+
+    Many distributions in the config files and corpora take the form of probability ranges
+    -- e.g., ((0.2, 0.4), 'beige') -- where the selected value is the one whose range a random
+    number between 0.0 and 1.0 falls into. Rather than scanning all the ranges to find the
+    one containing a random number, this object sorts the ranges by their upper bounds once,
+    so that a draw is a binary search. For any given random number, the value selected is
+    the same one that a scan over the ranges would select.
+    """
+
+    def __init__(self, ranges):
+        """Initialize a Sampler object.
+
+        @param ranges: An iterable of ((lower_bound, upper_bound), value) tuples.
+        """
+        # Ranges that are empty or fall outside 0.0-1.0 can never be selected, so drop them
+        ranges = sorted(
+            (bounds, value) for bounds, value in ranges if bounds[0] < bounds[1] and bounds[0] < 1.0
+        )
+        self.upper_bounds = [bounds[1] for bounds, _ in ranges]
+        self.values = [value for _, value in ranges]
+
+    @classmethod
+    def from_fitted_probability_distribution(cls, fitted_probability_distribution):
+        """Return a sampler for a dictionary of the kind returned by fit_probability_distribution()."""
+        return cls(
+            ranges=((fitted_probability_distribution[k], k) for k in fitted_probability_distribution)
+        )
+
+    @classmethod
+    def from_cumulative_bounds(cls, upper_bounds, values):
+        """Return a sampler for values whose ranges are delimited by the given sorted upper bounds.
+
+        This is used for distributions that were compiled ahead of time, e.g., precompiled
+        corpora, and so do not need to be sorted again.
+        """
+        assert len(upper_bounds) == len(values), "Every value must have an upper bound"
+        sampler = cls(ranges=())
+        sampler.upper_bounds = list(upper_bounds)
+        sampler.values = list(values)
+        return sampler
+
+    def draw(self, x=None):
+        """Return the value whose range the given random number falls into.
+
+        @param x: A number between 0.0 and 1.0; if None, a random one will be generated.
+        """
+        if x is None:
+            x = random.random()
+        # Guard against an upper bound falling a rounding error short of 1.0
+        return self.values[min(bisect_right(self.upper_bounds, x), len(self.values)-1)]
+
+    def sample(self, n):
+        """Return a list of n independent draws."""
+        values, upper_bounds, last_index = self.values, self.upper_bounds, len(self.values)-1
+        return [values[min(bisect_right(upper_bounds, random.random()), last_index)] for _ in xrange(n)]
+
+
+class IndexedSet(collections.MutableSet):
+    """A set that supports choosing a uniformly random member in constant time.
+
+    The town keeps its residents, companies, and dwelling places in objects of this class,
+    since picking a random one of these used to require copying the whole set into a list.
+    Members are stored in a list (with a dictionary mapping each member to its position), and
+    iteration follows the order in which members were added, so that seeded runs iterate
+    over them in the same order regardless of the memory addresses that sets hash on. Removed
+    members leave holes in the list, which get compacted once they make up half of it.
+    """
+
+    _HOLE = object()  # Placeholder for a removed member
+
+    def __init__(self, iterable=()):
+        """Initialize an IndexedSet object.
+
+        @param iterable: Initial members for this set.
+        """
+        self._members = []
+        self._position_of = {}
+        self._number_of_holes = 0
+        for member in iterable:
+            self.add(member)
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        """Return the result of a set operation (e.g., a union) as a plain set."""
+        return set(iterable)
+
+    def __contains__(self, member):
+        return member in self._position_of
+
+    def __iter__(self):
+        hole = self._HOLE
+        for member in self._members:
+            if member is not hole:
+                yield member
+
+    def __len__(self):
+        return len(self._position_of)
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, list(self))
+
+    def add(self, member):
+        """Add a member to this set, if it is not already in it."""
+        if member not in self._position_of:
+            self._position_of[member] = len(self._members)
+            self._members.append(member)
+
+    def discard(self, member):
+        """Remove a member from this set, if it is in it."""
+        position = self._position_of.pop(member, None)
+        if position is not None:
+            self._members[position] = self._HOLE
+            self._number_of_holes += 1
+            if self._number_of_holes * 2 > len(self._members):
+                self._compact()
+
+    def _compact(self):
+        """Remove the holes left in the member list by removed members."""
+        self._members = list(self)
+        self._position_of = {member: position for position, member in enumerate(self._members)}
+        self._number_of_holes = 0
+
+    def random_choice(self, condition=None):
+        """Return a uniformly random member of this set.
+
+        @param condition: Optionally, a function that the chosen member must satisfy.
+        """
+        if not self._position_of:
+            raise IndexError('Cannot choose from an empty set')
+        members, hole = self._members, self._HOLE
+        # Since at most half of the list is holes, this will rarely take more than a few tries
+        for _ in xrange(2 * len(members)):
+            member = members[int(random.random() * len(members))]
+            if member is not hole and (condition is None or condition(member)):
+                return member
+        # Few (or no) members satisfy the condition, so just consider all of them
+        return random.choice([member for member in self if condition is None or condition(member)])